@@ -37,6 +37,11 @@ def create_app(config_name='default'):
     # 代理修复（用于Nginx等反向代理）
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
+    # orjson可用时替换JSON提供器，加速API响应序列化
+    from app.utils.json_provider import OrjsonProvider
+    if OrjsonProvider is not None:
+        app.json = OrjsonProvider(app)
+
     # 初始化扩展
     init_extensions(app)
 
@@ -64,9 +69,22 @@ def create_app(config_name='default'):
 def init_extensions(app):
     """初始化Flask扩展"""
 
-    # 数据库
+    # 数据库（显式连接池配置，config可覆盖，如单进程部署使用NullPool）
+    # query_cache_size放大已编译语句缓存，短查询免去重复编译
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {
+        'pool_size': 10,
+        'max_overflow': 5,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'query_cache_size': 1200,
+    })
     db.init_app(app)
 
+    @app.teardown_appcontext
+    def shutdown_session(exception=None):
+        """请求结束后释放数据库会话，避免连接滞留在事务中"""
+        db.session.remove()
+
     # 数据库迁移
     migrate.init_app(app, db)
 
@@ -80,16 +98,22 @@ def init_extensions(app):
     # CSRF保护
     csrf.init_app(app)
 
-    # 邮件
-    mail.init_app(app)
+    # 邮件（未配置邮件服务器时跳过初始化）
+    if app.config.get('MAIL_SERVER'):
+        mail.init_app(app)
 
-    # 缓存
+    # 缓存（生产环境建议Redis后端：CACHE_TYPE=RedisCache + CACHE_REDIS_URL）
+    app.config.setdefault('CACHE_TYPE', os.environ.get('CACHE_TYPE', 'SimpleCache'))
+    if os.environ.get('CACHE_REDIS_URL'):
+        app.config.setdefault('CACHE_REDIS_URL', os.environ['CACHE_REDIS_URL'])
     cache.init_app(app)
 
-    # 管理后台
-    admin.init_app(app)
-    admin.name = app.config.get('SITE_NAME', 'OneBookNav')
-    admin.template_mode = 'bootstrap4'
+    # 管理后台（API-only部署可通过ENABLE_ADMIN=False关闭，
+    # 省去Flask-Admin的蓝图注册与模板加载链）
+    if app.config.get('ENABLE_ADMIN', True):
+        admin.init_app(app)
+        admin.name = app.config.get('SITE_NAME', 'OneBookNav')
+        admin.template_mode = 'bootstrap4'
 
     # 配置用户加载器
     @login_manager.user_loader
@@ -109,9 +133,10 @@ def register_blueprints(app):
     from app.auth import bp as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
 
-    # 管理蓝图
-    from app.admin import bp as admin_bp
-    app.register_blueprint(admin_bp, url_prefix='/admin')
+    # 管理蓝图（与Flask-Admin一起受ENABLE_ADMIN开关控制）
+    if app.config.get('ENABLE_ADMIN', True):
+        from app.admin import bp as admin_bp
+        app.register_blueprint(admin_bp, url_prefix='/admin')
 
     # API蓝图
     from app.api import bp as api_bp
@@ -152,19 +177,22 @@ def register_error_handlers(app):
 def register_context_processors(app):
     """注册上下文处理器"""
 
+    # 注册时一次性解析依赖并绑定为闭包变量，
+    # 避免每次模板渲染重复import查找
+    from app.utils.request_cache import g_cached
+    from app.utils.settings_cache import cached_site_settings
+    from app.utils.theme import get_available_themes
+
     @app.context_processor
     def inject_global_vars():
         """注入全局模板变量"""
-        from app.models import SiteSettings
-        from app.utils.theme import get_current_theme, get_available_themes
-
-        # 获取网站设置
-        settings = SiteSettings.get_settings()
-
+        # 上下文处理器每次模板渲染都会执行，
+        # 在g上做请求级记忆化，同一请求内只取一次；
+        # 主题已在before_request解析到g.theme，直接复用
         return {
-            'site_settings': settings,
-            'current_theme': get_current_theme(),
-            'available_themes': get_available_themes(),
+            'site_settings': g_cached('_site_settings', cached_site_settings),
+            'current_theme': g.theme,
+            'available_themes': g_cached('_available_themes', get_available_themes),
             'app_config': app.config
         }
 
@@ -178,16 +206,55 @@ def register_context_processors(app):
         return {}
 
 
+# 固定安全响应头（模块级预构造，避免每次响应重建字符串）
+_SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+)
+
+
 def register_request_handlers(app):
     """注册请求处理器"""
 
+    # 注册时一次性解析依赖并绑定为闭包变量
+    import atexit
+    from app.utils.last_seen import touch as touch_last_seen, flush as flush_last_seen
+    from app.utils.click_buffer import flush as flush_clicks, flush_if_due as flush_clicks_if_due
+
+    # 进程退出前回写残留的点击缓冲（flush需要应用上下文；
+    # 尽力而为，退出阶段数据库不可用时不阻塞关停）
+    def _flush_clicks_at_exit():
+        try:
+            with app.app_context():
+                flush_clicks()
+        except Exception:
+            pass
+
+    atexit.register(_flush_clicks_at_exit)
+
+    # 预计算静态资源端点集合，替代每次响应的字符串前缀匹配
+    static_endpoints = frozenset(
+        endpoint for endpoint in app.view_functions
+        if endpoint == 'static' or endpoint.endswith('.static')
+    )
+
+    # 安全头由反向代理统一注入时（add_header，见README_DEPLOY.md），
+    # Python侧完全跳过逐响应的头设置
+    headers_at_proxy = app.config.get('HEADERS_AT_PROXY', False)
+
     @app.before_request
     def before_request():
         """请求前处理"""
-        # 记录用户最后活动时间
+        # 记录用户最后活动时间（节流+批量回写，不在每个请求上提交事务）
+        # 同时把身份信息解析一次缓存到g，视图内不再反复走LocalProxy
         if current_user.is_authenticated:
-            current_user.update_last_seen()
-            db.session.commit()
+            touch_last_seen(current_user.id)
+            g.user_id = current_user.id
+            g.is_admin = current_user.is_admin()
+        else:
+            g.user_id = None
+            g.is_admin = False
 
         # 设置当前用户到g对象
         g.user = current_user
@@ -197,18 +264,25 @@ def register_request_handlers(app):
         if theme and theme in app.config.get('THEMES', {}):
             session['theme'] = theme
 
+        # 当前主题每个请求解析一次，缓存到g供视图与模板使用
+        g.theme = session.get('theme') or app.config.get('DEFAULT_THEME', 'default')
+
     @app.after_request
     def after_request(response):
         """请求后处理"""
         # 安全头设置
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY'
-        response.headers['X-XSS-Protection'] = '1; mode=block'
+        if not headers_at_proxy:
+            for header, value in _SECURITY_HEADERS:
+                response.headers[header] = value
 
-        # 缓存控制
-        if request.endpoint and request.endpoint.startswith('static'):
+        # 缓存控制（集合成员判断，静态端点在启动时已收集）
+        if request.endpoint in static_endpoints:
             response.cache_control.max_age = 31536000  # 1年
 
+        # 批量回写缓冲的用户活动时间与到期的点击缓冲
+        flush_last_seen()
+        flush_clicks_if_due()
+
         return response
 
 
@@ -229,6 +303,13 @@ def register_cli_commands(app):
         update_search_index()
         print("Search index updated successfully!")
 
+    @app.cli.command()
+    def backfill_counters():
+        """回填分类与标签的冗余网站计数"""
+        from app.models import backfill_website_counts
+        backfill_website_counts()
+        print("Website counters backfilled successfully!")
+
     @app.cli.command()
     def cleanup_temp_files():
         """清理临时文件"""
@@ -244,8 +325,11 @@ def configure_logging(app):
         if not os.path.exists('logs'):
             os.mkdir('logs')
 
-        # 文件日志处理器
-        from logging.handlers import RotatingFileHandler
+        # 文件日志处理器（经队列异步写入，请求线程只做非阻塞入队）
+        import atexit
+        import queue
+        from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
         file_handler = RotatingFileHandler(
             'logs/onebooknav.log',
             maxBytes=10240000,  # 10MB
@@ -255,7 +339,15 @@ def configure_logging(app):
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
         ))
         file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
+
+        log_queue = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(logging.INFO)
+        app.logger.addHandler(queue_handler)
+
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
 
         app.logger.setLevel(logging.INFO)
         app.logger.info('OneBookNav startup')
@@ -3,41 +3,70 @@
 OneBookNav 管理路由
 处理后台管理功能的路由
 """
-from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
-from flask_login import login_required, current_user
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, g
+from flask_login import current_user
 from functools import wraps
 
 from app.admin import bp
-from app.models import User, Category, Website, Tag, SiteSettings, InvitationCode, UserRole
-from app import db
+from sqlalchemy import func, select
+
+from app.models import User, Category, Website, Tag, SiteSettings, InvitationCode
+from app import db, cache
 
 
 def admin_required(f):
-    """管理员权限装饰器"""
+    """管理员权限装饰器（含登录检查，结果缓存在g上，每个请求只判定一次）"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin():
+        is_admin = getattr(g, '_is_admin', None)
+        if is_admin is None:
+            is_admin = current_user.is_authenticated and current_user.is_admin()
+            g._is_admin = is_admin
+        if not is_admin:
             flash('您需要管理员权限才能访问此页面。', 'error')
             return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+def _dashboard_cache_key():
+    """仪表盘视图缓存键（渲染结果含用户名，按管理员区分）"""
+    return f'dash:{current_user.get_id()}'
+
+
 @bp.route('/')
 @bp.route('/dashboard')
-@login_required
 @admin_required
+@cache.cached(timeout=30, key_prefix=_dashboard_cache_key)
 def dashboard():
     """管理后台首页"""
-    # 统计数据
-    stats = {
-        'total_users': User.query.count(),
-        'total_categories': Category.query.count(),
-        'total_websites': Website.query.count(),
-        'total_tags': Tag.query.count(),
-        'active_users': User.query.filter_by(is_active=True).count(),
-        'public_websites': Website.query.filter_by(is_public=True, is_active=True).count(),
-    }
+    # 统计数据（六个COUNT合并为一条语句，结果缓存30秒；
+    # 经ORM构造标量子查询，user等保留字的引用与布尔条件由方言处理）
+    stats = cache.get('admin_dash_stats')
+    if stats is None:
+        def _count(model, *criteria):
+            stmt = select(func.count()).select_from(model)
+            if criteria:
+                stmt = stmt.where(*criteria)
+            return stmt.scalar_subquery()
+
+        row = db.session.execute(select(
+            _count(User),
+            _count(Category),
+            _count(Website),
+            _count(Tag),
+            _count(User, User.is_active == True),
+            _count(Website, Website.is_public == True, Website.is_active == True),
+        )).one()
+        stats = {
+            'total_users': row[0],
+            'total_categories': row[1],
+            'total_websites': row[2],
+            'total_tags': row[3],
+            'active_users': row[4],
+            'public_websites': row[5],
+        }
+        cache.set('admin_dash_stats', stats, timeout=30)
 
     # 最近注册的用户
     recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
@@ -55,19 +84,16 @@ def dashboard():
 
 
 @bp.route('/users')
-@login_required
 @admin_required
 def users():
     """用户管理"""
     page = request.args.get('page', 1, type=int)
     per_page = 20
 
+    # 窗口函数一次取回页数据和总数，减少一次COUNT往返
+    from app.utils.pagination import window_paginate
     users_query = User.query.order_by(User.created_at.desc())
-    pagination = users_query.paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
+    pagination = window_paginate(users_query, page, per_page)
 
     return render_template(
         'admin/users.html',
@@ -78,7 +104,6 @@ def users():
 
 
 @bp.route('/categories')
-@login_required
 @admin_required
 def categories():
     """分类管理"""
@@ -92,19 +117,16 @@ def categories():
 
 
 @bp.route('/websites')
-@login_required
 @admin_required
 def websites():
     """网站管理"""
     page = request.args.get('page', 1, type=int)
     per_page = 20
 
+    # 窗口函数一次取回页数据和总数，减少一次COUNT往返
+    from app.utils.pagination import window_paginate
     websites_query = Website.query.order_by(Website.created_at.desc())
-    pagination = websites_query.paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
+    pagination = window_paginate(websites_query, page, per_page)
 
     return render_template(
         'admin/websites.html',
@@ -115,7 +137,6 @@ def websites():
 
 
 @bp.route('/settings')
-@login_required
 @admin_required
 def settings():
     """系统设置"""
@@ -136,7 +157,6 @@ def settings():
 
 
 @bp.route('/invitation-codes')
-@login_required
 @admin_required
 def invitation_codes():
     """邀请码管理"""
@@ -151,7 +171,6 @@ def invitation_codes():
 
 # 基础的管理API接口占位符
 @bp.route('/api/users/<int:user_id>/toggle-status', methods=['POST'])
-@login_required
 @admin_required
 def toggle_user_status(user_id):
     """切换用户状态"""
@@ -3,16 +3,35 @@
 OneBookNav API路由
 提供RESTful API接口
 """
-from flask import jsonify, request, current_app
+from flask import jsonify, request, current_app, g
 from flask_login import current_user, login_required
-from sqlalchemy import or_, func
+from sqlalchemy import and_, or_, func, tuple_
+from sqlalchemy.orm import joinedload
 
 from app.api import bp
-from app.models import Category, Website, Tag, User, SiteSettings
-from app import db
+from app.models import Category, Website, Tag, User
+from app import db, cache
+from app.utils.json_cache import json_cache
+
+
+def _cached_total_clicks() -> int:
+    """读取缓存的总点击量，未命中时回源SUM并回填"""
+    total = cache.get('stats:total_clicks')
+    if total is None:
+        total = db.session.query(func.sum(Website.click_count)).scalar() or 0
+        cache.set('stats:total_clicks', total, timeout=300)
+    return total
+
+
+def _bump_cached_total_clicks(delta: int = 1):
+    """点击后增量更新缓存的总点击量，避免全表SUM"""
+    total = cache.get('stats:total_clicks')
+    if total is not None:
+        cache.set('stats:total_clicks', total + delta, timeout=300)
 
 
 @bp.route('/categories')
+@json_cache(timeout=60)
 def get_categories():
     """获取分类列表"""
     # 权限过滤
@@ -40,7 +59,7 @@ def get_category(category_id):
 
     # 权限检查
     if not category.is_public and (not current_user.is_authenticated or
-                                  (category.user_id != current_user.id and not current_user.is_admin())):
+                                  (category.user_id != current_user.id and not g.is_admin)):
         return jsonify({'error': '没有权限访问此分类'}), 403
 
     return jsonify(category.to_dict(include_websites=True))
@@ -54,14 +73,27 @@ def get_websites():
     category_id = request.args.get('category_id', type=int)
     tag_id = request.args.get('tag_id', type=int)
     search = request.args.get('search', '').strip()
+    after = request.args.get('after')
+
+    # 轻量模式：公开数据的列投影直出，绕开ORM实例构建
+    # （无标签列表与分页元数据，适合公开导航页的只读渲染）
+    if request.args.get('lite', type=int):
+        rows = Website.public_rows(category_id=category_id)
+        return jsonify({
+            'websites': [dict(row) for row in rows]
+        })
 
-    # 构建查询
-    query = Website.query.filter_by(is_active=True)
+    # 构建查询（有搜索词时优先走FTS5全文索引）
+    if search:
+        from app.utils.search import search_websites
+        query = search_websites(search).filter(Website.is_active == True)
+    else:
+        query = Website.query.filter_by(is_active=True)
 
     # 权限过滤
     if not current_user.is_authenticated:
         query = query.filter_by(is_public=True)
-    elif not current_user.is_admin():
+    elif not g.is_admin:
         query = query.filter(
             or_(
                 Website.is_public == True,
@@ -77,17 +109,35 @@ def get_websites():
     if tag_id:
         query = query.join(Website.tags).filter(Tag.id == tag_id)
 
-    # 搜索过滤
-    if search:
-        query = query.filter(
-            or_(
-                Website.title.contains(search),
-                Website.description.contains(search),
-                Website.keywords.contains(search)
-            )
+    query = query.options(
+        joinedload(Website.category).load_only(Category.name)
+    )
+
+    # 键集分页：?after=<游标> 按(created_at, id)定位，深分页代价恒定
+    if after is not None:
+        from app.utils.pagination import decode_cursor, encode_cursor
+
+        limit = max(1, min(per_page, 100))  # 下限同样夹紧，per_page<=0会取空页并在编码游标时越界
+        keyset_query = query.order_by(
+            Website.created_at.desc(),
+            Website.id.desc()
         )
+        cursor = decode_cursor(after)
+        if cursor:
+            keyset_query = keyset_query.filter(
+                tuple_(Website.created_at, Website.id) < cursor
+            )
+        items = keyset_query.limit(limit + 1).all()
+        has_next = len(items) > limit
+        items = items[:limit]
+
+        return jsonify({
+            'websites': [website.to_dict() for website in items],
+            'next_cursor': encode_cursor(items[-1].created_at, items[-1].id) if has_next else None,
+            'has_next': has_next
+        })
 
-    # 分页
+    # 页码分页（兼容旧客户端）
     pagination = query.order_by(
         Website.sort_order,
         Website.created_at.desc()
@@ -117,7 +167,7 @@ def get_website(website_id):
 
     # 权限检查
     if not website.is_public and (not current_user.is_authenticated or
-                                 (website.user_id != current_user.id and not current_user.is_admin())):
+                                 (website.user_id != current_user.id and not g.is_admin)):
         return jsonify({'error': '没有权限访问此网站'}), 403
 
     return jsonify(website.to_dict())
@@ -130,35 +180,51 @@ def click_website(website_id):
 
     # 权限检查
     if not website.is_public and (not current_user.is_authenticated or
-                                 (website.user_id != current_user.id and not current_user.is_admin())):
+                                 (website.user_id != current_user.id and not g.is_admin)):
         return jsonify({'error': '没有权限访问此网站'}), 403
 
-    # 增加点击次数
-    website.increment_click()
-    db.session.commit()
+    # 点击计入内存缓冲，周期性批量回写，避免热点路径上的同步写事务
+    from app.utils.click_buffer import record
+    pending = record(website_id)
+    _bump_cached_total_clicks()
 
     return jsonify({
         'success': True,
-        'click_count': website.click_count
+        # 估算值：库中计数 + 未回写的增量
+        'click_count': website.click_count + pending
     })
 
 
 @bp.route('/tags')
+@json_cache(timeout=60)
 def get_tags():
     """获取标签列表"""
-    # 获取有网站的标签
-    tags = Tag.query.join(Tag.websites).filter(
-        Website.is_active == True
-    ).distinct().order_by(Tag.usage_count.desc()).all()
-
-    # 权限过滤
+    # 匿名访问走预聚合的公开网站计数缓存，无需任何关系查询
     if not current_user.is_authenticated:
-        tags = [tag for tag in tags if any(w.is_public for w in tag.websites if w.is_active)]
-    elif not current_user.is_admin():
-        tags = [tag for tag in tags if any(
-            w.is_public or w.user_id == current_user.id
-            for w in tag.websites if w.is_active
-        )]
+        from app.utils.tag_stats import get_tag_public_counts
+        visible_ids = get_tag_public_counts()
+        tags = Tag.query.filter(
+            Tag.id.in_(visible_ids)
+        ).order_by(Tag.usage_count.desc()).all()
+
+        return jsonify({
+            'tags': [tag.to_dict() for tag in tags]
+        })
+
+    # 登录用户：可见性条件下推到SQL（EXISTS子查询）
+    visible = Website.is_active == True
+    if not g.is_admin:
+        visible = and_(
+            visible,
+            or_(
+                Website.is_public == True,
+                Website.user_id == current_user.id
+            )
+        )
+
+    tags = Tag.query.filter(
+        Tag.websites.any(visible)
+    ).order_by(Tag.usage_count.desc()).all()
 
     return jsonify({
         'tags': [tag.to_dict() for tag in tags]
@@ -186,21 +252,14 @@ def search():
             }
         })
 
-    # 搜索网站
-    websites_query = Website.query.filter(
-        Website.is_active == True,
-        or_(
-            Website.title.contains(query),
-            Website.description.contains(query),
-            Website.keywords.contains(query),
-            Website.url.contains(query)
-        )
-    )
+    # 搜索网站（优先使用FTS5全文索引）
+    from app.utils.search import search_websites
+    websites_query = search_websites(query).filter(Website.is_active == True)
 
     # 权限过滤
     if not current_user.is_authenticated:
         websites_query = websites_query.filter_by(is_public=True)
-    elif not current_user.is_admin():
+    elif not g.is_admin:
         websites_query = websites_query.filter(
             or_(
                 Website.is_public == True,
@@ -208,8 +267,10 @@ def search():
             )
         )
 
-    # 分页
-    pagination = websites_query.order_by(
+    # 分页（预取分类和标签，避免序列化时逐行惰性加载）
+    pagination = websites_query.options(
+        joinedload(Website.category).load_only(Category.name)
+    ).order_by(
         Website.click_count.desc(),
         Website.created_at.desc()
     ).paginate(
@@ -233,18 +294,24 @@ def search():
 
 
 @bp.route('/stats')
+@json_cache(timeout=30)
 def get_stats():
     """获取统计信息"""
-    # 基本统计
-    stats = {
-        'total_categories': Category.query.filter_by(is_public=True, is_visible=True).count(),
-        'total_websites': Website.query.filter_by(is_public=True, is_active=True).count(),
-        'total_tags': Tag.query.count(),
-        'total_clicks': db.session.query(func.sum(Website.click_count)).scalar() or 0
-    }
+    # 基本统计（计数缓存60秒；总点击量由点击接口增量维护）
+    stats = cache.get('api_stats_counts')
+    if stats is None:
+        stats = {
+            'total_categories': Category.query.filter_by(is_public=True, is_visible=True).count(),
+            'total_websites': Website.query.filter_by(is_public=True, is_active=True).count(),
+            'total_tags': Tag.query.count(),
+        }
+        cache.set('api_stats_counts', stats, timeout=60)
+    else:
+        stats = dict(stats)
+    stats['total_clicks'] = _cached_total_clicks()
 
     # 热门网站
-    popular_websites = Website.query.filter_by(
+    popular_websites = Website.list_query().filter_by(
         is_public=True, is_active=True
     ).order_by(Website.click_count.desc()).limit(10).all()
 
@@ -254,13 +321,12 @@ def get_stats():
 
 
 @bp.route('/settings')
+@json_cache(timeout=300)
 def get_public_settings():
     """获取公开设置"""
-    settings = SiteSettings.query.filter_by(is_public=True).all()
+    from app.utils.settings_cache import cached_public_settings
 
-    return jsonify({
-        setting.key: setting.get_value() for setting in settings
-    })
+    return jsonify(cached_public_settings())
 
 
 # 用户相关API（需要登录）
@@ -268,7 +334,10 @@ def get_public_settings():
 @login_required
 def get_user_categories():
     """获取用户分类"""
-    categories = current_user.categories.filter_by(is_visible=True).order_by(Category.sort_order).all()
+    # 显式走(user_id, is_visible)索引查询，替代动态关系的即席SELECT
+    categories = Category.query.filter_by(
+        user_id=current_user.id, is_visible=True
+    ).order_by(Category.sort_order).all()
 
     return jsonify({
         'categories': [cat.to_dict() for cat in categories]
@@ -282,7 +351,9 @@ def get_user_websites():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
 
-    pagination = current_user.websites.filter_by(is_active=True).order_by(
+    pagination = current_user.websites.filter_by(is_active=True).options(
+        joinedload(Website.category).load_only(Category.name)
+    ).order_by(
         Website.sort_order,
         Website.created_at.desc()
     ).paginate(
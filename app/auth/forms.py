@@ -3,13 +3,19 @@
 OneBookNav 认证表单
 处理用户登录、注册等表单定义
 """
+import re
+
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError, Optional
 from wtforms.widgets import TextArea
+from sqlalchemy import func
 
 from app.models import User
 
+# 用户名格式（模块级预编译，避免每次提交查模式缓存）
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]+$')
+
 
 class LoginForm(FlaskForm):
     """登录表单"""
@@ -61,18 +67,21 @@ class RegistrationForm(FlaskForm):
 
     def validate_username(self, username):
         """验证用户名唯一性"""
-        user = User.query.filter_by(username=username.data).first()
+        # 先做廉价的格式检查，非法用户名不触发数据库查询
+        if not _USERNAME_RE.match(username.data):
+            raise ValidationError('用户名只能包含字母、数字和下划线。')
+
+        user = User.query.filter(
+            func.lower(User.username) == username.data.lower()
+        ).first()
         if user is not None:
             raise ValidationError('用户名已被使用，请选择其他用户名。')
 
-        # 检查用户名格式
-        import re
-        if not re.match(r'^[a-zA-Z0-9_]+$', username.data):
-            raise ValidationError('用户名只能包含字母、数字和下划线。')
-
     def validate_email(self, email):
         """验证邮箱唯一性"""
-        user = User.query.filter_by(email=email.data).first()
+        user = User.query.filter(
+            func.lower(User.email) == email.data.lower()
+        ).first()
         if user is not None:
             raise ValidationError('邮箱已被使用，请选择其他邮箱。')
 
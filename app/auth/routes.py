@@ -3,14 +3,30 @@
 OneBookNav 认证路由
 处理用户登录、注册、注销等认证功能的路由
 """
-from flask import render_template, redirect, url_for, flash, request, current_app, session
+from flask import redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.urls import url_parse
+from urllib.parse import urlparse
+
+from sqlalchemy import func, select
 
 from app.auth import bp
 from app.auth.forms import LoginForm, RegistrationForm, ForgotPasswordForm, ResetPasswordForm
-from app.models import User, InvitationCode, UserRole, SiteSettings
+from app.models import User, Category, Website, InvitationCode, UserRole, SiteSettings
 from app import db
+from app.utils.last_seen import touch as touch_last_seen
+from app.utils.rate_limit import rate_limit
+from app.utils.existence_cache import username_exists, email_exists, add_user as cache_new_user
+from app.utils.theme import themed
+
+# 允许的重定向scheme（模块级常量，避免每次请求重建）
+_SAFE_SCHEMES = frozenset(('', 'http', 'https'))
+
+
+def _is_safe_redirect(target: str) -> bool:
+    """next参数是否为站内安全跳转目标"""
+    parts = urlparse(target)
+    return (parts.scheme in _SAFE_SCHEMES
+            and parts.netloc in ('', request.host))
 
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -21,9 +37,10 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
-        # 查找用户（支持用户名或邮箱登录）
+        # 查找用户（支持用户名或邮箱登录，大小写不敏感，走lower()函数索引）
+        identity = form.username.data.lower()
         user = User.query.filter(
-            (User.username == form.username.data) | (User.email == form.username.data)
+            (func.lower(User.username) == identity) | (func.lower(User.email) == identity)
         ).first()
 
         if user and user.check_password(form.password.data):
@@ -34,13 +51,12 @@ def login():
             # 登录用户
             login_user(user, remember=form.remember_me.data)
 
-            # 记录登录时间
-            user.update_last_seen()
-            db.session.commit()
+            # 记录登录时间（写入内存缓冲批量回写，不在登录路径上同步提交）
+            touch_last_seen(user.id)
 
             # 重定向到原始页面或首页
             next_page = request.args.get('next')
-            if not next_page or url_parse(next_page).netloc != '':
+            if not next_page or not _is_safe_redirect(next_page):
                 next_page = url_for('main.index')
 
             flash(f'欢迎回来，{user.username}！', 'success')
@@ -48,11 +64,9 @@ def login():
         else:
             flash('用户名/邮箱或密码错误。', 'error')
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/login.html',
+    return themed(
+        'auth/login.html',
         title='登录',
         form=form
     )
@@ -75,7 +89,7 @@ def register():
         return redirect(url_for('main.index'))
 
     # 检查是否允许注册
-    registration_enabled = SiteSettings.get_value('registration_enabled', True)
+    registration_enabled = SiteSettings.get_cached_value('registration_enabled', True)
     if not registration_enabled:
         flash('当前不允许注册新用户。', 'error')
         return redirect(url_for('auth.login'))
@@ -91,8 +105,8 @@ def register():
 
             if not invitation_code or not invitation_code.is_valid():
                 flash('邀请码无效或已过期。', 'error')
-                return render_template(
-                    f'themes/{session.get("theme", current_app.config.get("DEFAULT_THEME", "default"))}/auth/register.html',
+                return themed(
+                    'auth/register.html',
                     title='注册',
                     form=form
                 )
@@ -114,14 +128,15 @@ def register():
         db.session.add(user)
         db.session.commit()
 
+        # 同步存在性缓存，/check-*端点立即可见新用户
+        cache_new_user(user.username, user.email)
+
         flash('注册成功！请登录。', 'success')
         return redirect(url_for('auth.login'))
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/register.html',
+    return themed(
+        'auth/register.html',
         title='注册',
         form=form
     )
@@ -142,11 +157,9 @@ def forgot_password():
         else:
             flash('该邮箱地址不存在。', 'error')
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/forgot_password.html',
+    return themed(
+        'auth/forgot_password.html',
         title='忘记密码',
         form=form
     )
@@ -165,11 +178,9 @@ def reset_password(token):
         flash('密码重置成功！', 'success')
         return redirect(url_for('auth.login'))
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/reset_password.html',
+    return themed(
+        'auth/reset_password.html',
         title='重置密码',
         form=form
     )
@@ -179,20 +190,29 @@ def reset_password(token):
 @login_required
 def profile():
     """用户资料"""
-    # 获取用户统计信息
+    # 获取用户统计信息（三个聚合合并为一条语句）
+    categories_count, websites_count, total_clicks = db.session.execute(
+        select(
+            select(func.count()).select_from(Category).where(
+                Category.user_id == current_user.id
+            ).scalar_subquery(),
+            select(func.count()).select_from(Website).where(
+                Website.user_id == current_user.id
+            ).scalar_subquery(),
+            select(func.coalesce(func.sum(Website.click_count), 0)).where(
+                Website.user_id == current_user.id
+            ).scalar_subquery(),
+        )
+    ).one()
     user_stats = {
-        'categories_count': current_user.categories.count(),
-        'websites_count': current_user.websites.count(),
-        'total_clicks': db.session.query(
-            db.func.sum(Website.click_count)
-        ).filter_by(user_id=current_user.id).scalar() or 0
+        'categories_count': categories_count,
+        'websites_count': websites_count,
+        'total_clicks': total_clicks
     }
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/profile.html',
+    return themed(
+        'auth/profile.html',
         title='个人资料',
         user_stats=user_stats
     )
@@ -202,46 +222,45 @@ def profile():
 @login_required
 def settings():
     """用户设置"""
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/auth/settings.html',
+    return themed(
+        'auth/settings.html',
         title='用户设置'
     )
 
 
 @bp.route('/check-username')
+@rate_limit(10, per=60)
 def check_username():
     """检查用户名是否可用（AJAX）"""
     username = request.args.get('username', '').strip()
     if not username:
         return {'available': False, 'message': '用户名不能为空'}
 
-    # 检查用户名是否已存在
-    user = User.query.filter_by(username=username).first()
-    if user:
+    # 缓存的存在集合做成员判断，不触发数据库查询
+    if username_exists(username):
         return {'available': False, 'message': '用户名已被使用'}
 
     return {'available': True, 'message': '用户名可用'}
 
 
 @bp.route('/check-email')
+@rate_limit(10, per=60)
 def check_email():
     """检查邮箱是否可用（AJAX）"""
     email = request.args.get('email', '').strip()
     if not email:
         return {'available': False, 'message': '邮箱不能为空'}
 
-    # 检查邮箱是否已存在
-    user = User.query.filter_by(email=email).first()
-    if user:
+    # 缓存的存在集合做成员判断，不触发数据库查询
+    if email_exists(email):
         return {'available': False, 'message': '邮箱已被使用'}
 
     return {'available': True, 'message': '邮箱可用'}
 
 
 @bp.route('/verify-invitation-code')
+@rate_limit(10, per=60)
 def verify_invitation_code():
     """验证邀请码（AJAX）"""
     code = request.args.get('code', '').strip()
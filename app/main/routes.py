@@ -3,25 +3,40 @@
 OneBookNav 主页面路由
 处理主页面、分类页面、搜索等核心功能的路由
 """
-from flask import render_template, request, jsonify, session, current_app, redirect, url_for, flash
+from flask import render_template, request, jsonify, session, current_app, redirect, url_for, flash, g
 from flask_login import current_user, login_required
-from sqlalchemy import or_
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import load_only
 
 from app.main import bp
-from app.models import Category, Website, Tag, SiteSettings
-from app import db
+from app.models import Category, Website, Tag, SiteSettings, website_tags
+from app import db, cache
+from app.utils.click_buffer import record as record_click
+from app.utils.search import search_websites
+from app.utils.theme import themed
+
+
+# 列表视图只渲染这些列，load_only跳过keywords等大字段的取回
+_WEBSITE_LIST_COLS = (
+    Website.id, Website.title, Website.url, Website.description,
+    Website.icon, Website.click_count, Website.sort_order, Website.created_at,
+)
+
+
+def _view_cache_key():
+    """视图缓存键：端点 + 用户 + 主题（渲染结果因两者而异）"""
+    return f"view:{request.endpoint}:{current_user.get_id() or 0}:{g.theme}"
 
 
 @bp.route('/')
 @bp.route('/index')
+@cache.cached(timeout=60, make_cache_key=_view_cache_key,
+              unless=lambda: current_user.is_authenticated)
 def index():
     """首页"""
     # 获取网站设置
     settings = SiteSettings.get_settings()
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-
     # 获取分类和网站
     if current_user.is_authenticated:
         # 登录用户可以看到自己的私有内容
@@ -37,18 +52,28 @@ def index():
             is_public=True, is_visible=True, parent_id=None
         ).order_by(Category.sort_order).all()
 
+    # 批量预取各分类的子分类与网站，模板渲染不再逐分类发查询
+    Category.preload_children_and_websites(
+        categories,
+        viewer_id=current_user.id if current_user.is_authenticated else None
+    )
+
     # 获取精选网站
-    featured_websites = Website.query.filter_by(
+    featured_websites = Website.query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).filter_by(
         is_featured=True, is_active=True, is_public=True
     ).order_by(Website.sort_order).limit(8).all()
 
     # 获取最近添加的网站
-    recent_websites = Website.query.filter_by(
+    recent_websites = Website.query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).filter_by(
         is_active=True, is_public=True
     ).order_by(Website.created_at.desc()).limit(6).all()
 
-    return render_template(
-        f'themes/{current_theme}/index.html',
+    return themed(
+        'index.html',
         categories=categories,
         featured_websites=featured_websites,
         recent_websites=recent_websites,
@@ -63,26 +88,29 @@ def category_detail(category_id):
 
     # 权限检查
     if not category.is_public and (not current_user.is_authenticated or
-                                  (category.user_id != current_user.id and not current_user.is_admin())):
+                                  (category.user_id != current_user.id and not g.is_admin)):
         flash('您没有权限访问此分类。', 'error')
         return redirect(url_for('main.index'))
 
-    # 获取子分类
+    # 获取子分类（并批量预取其下级与网站，供模板渲染）
     subcategories = category.children.filter_by(is_visible=True).order_by(Category.sort_order).all()
+    Category.preload_children_and_websites(
+        subcategories,
+        viewer_id=current_user.id if current_user.is_authenticated else None
+    )
 
     # 获取网站列表
     websites_query = category.websites.filter_by(is_active=True)
 
-    if not current_user.is_authenticated or (category.user_id != current_user.id and not current_user.is_admin()):
+    if not current_user.is_authenticated or (category.user_id != current_user.id and not g.is_admin):
         websites_query = websites_query.filter_by(is_public=True)
 
-    websites = websites_query.order_by(Website.sort_order, Website.created_at.desc()).all()
-
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
+    websites = websites_query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).order_by(Website.sort_order, Website.created_at.desc()).all()
 
-    return render_template(
-        f'themes/{current_theme}/category.html',
+    return themed(
+        'category.html',
         category=category,
         subcategories=subcategories,
         websites=websites
@@ -99,21 +127,13 @@ def search():
     if not query:
         return render_template('search.html', websites=[], query='', pagination=None)
 
-    # 搜索网站
-    websites_query = Website.query.filter(
-        Website.is_active == True,
-        or_(
-            Website.title.contains(query),
-            Website.description.contains(query),
-            Website.keywords.contains(query),
-            Website.url.contains(query)
-        )
-    )
+    # 搜索网站（优先使用FTS5全文索引，无索引时回退LIKE）
+    websites_query = search_websites(query).filter(Website.is_active == True)
 
     # 权限过滤
     if not current_user.is_authenticated:
         websites_query = websites_query.filter_by(is_public=True)
-    elif not current_user.is_admin():
+    elif not g.is_admin:
         websites_query = websites_query.filter(
             or_(
                 Website.is_public == True,
@@ -133,11 +153,8 @@ def search():
 
     websites = pagination.items
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-
-    return render_template(
-        f'themes/{current_theme}/search.html',
+    return themed(
+        'search.html',
         websites=websites,
         query=query,
         pagination=pagination
@@ -151,38 +168,51 @@ def click_website(website_id):
 
     # 权限检查
     if not website.is_public and (not current_user.is_authenticated or
-                                 (website.user_id != current_user.id and not current_user.is_admin())):
+                                 (website.user_id != current_user.id and not g.is_admin)):
         return jsonify({'error': '没有权限访问此网站'}), 403
 
-    # 增加点击次数
-    website.increment_click()
-    db.session.commit()
+    # 点击计入内存缓冲，周期性批量回写，重定向路径上不再同步提交事务
+    record_click(website_id)
 
     return redirect(website.url)
 
 
 @bp.route('/tags')
+@cache.cached(timeout=60, make_cache_key=_view_cache_key)
 def tags():
     """标签页面"""
-    # 获取所有有网站的标签
-    tags = Tag.query.join(Tag.websites).filter(
-        Website.is_active == True
-    ).distinct().order_by(Tag.usage_count.desc()).all()
-
-    # 权限过滤（只显示公开网站的标签）
+    # 可见性过滤下推到SQL（EXISTS子查询），避免逐标签惰性加载网站集合
+    visible = Website.is_active == True
     if not current_user.is_authenticated:
-        tags = [tag for tag in tags if any(w.is_public for w in tag.websites if w.is_active)]
-    elif not current_user.is_admin():
-        tags = [tag for tag in tags if any(
-            w.is_public or w.user_id == current_user.id
-            for w in tag.websites if w.is_active
-        )]
-
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-
-    return render_template(
-        f'themes/{current_theme}/tags.html',
+        visible = and_(visible, Website.is_public == True)
+    elif not g.is_admin:
+        visible = and_(
+            visible,
+            or_(
+                Website.is_public == True,
+                Website.user_id == current_user.id
+            )
+        )
+
+    tags = Tag.query.filter(
+        Tag.websites.any(visible)
+    ).order_by(Tag.usage_count.desc()).all()
+
+    # 一次GROUP BY预取各标签的可见网站数，
+    # 模板读website_count时不再逐标签发COUNT查询
+    counts = dict(db.session.execute(
+        select(website_tags.c.tag_id, func.count())
+        .select_from(website_tags.join(
+            Website, website_tags.c.website_id == Website.id
+        ))
+        .where(visible)
+        .group_by(website_tags.c.tag_id)
+    ).all())
+    for tag in tags:
+        tag._website_count_cache = counts.get(tag.id, 0)
+
+    return themed(
+        'tags.html',
         tags=tags
     )
 
@@ -198,7 +228,7 @@ def tag_detail(tag_id):
     # 权限过滤
     if not current_user.is_authenticated:
         websites_query = websites_query.filter_by(is_public=True)
-    elif not current_user.is_admin():
+    elif not g.is_admin:
         websites_query = websites_query.filter(
             or_(
                 Website.is_public == True,
@@ -206,16 +236,15 @@ def tag_detail(tag_id):
             )
         )
 
-    websites = websites_query.order_by(
+    websites = websites_query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).order_by(
         Website.sort_order,
         Website.created_at.desc()
     ).all()
 
-    # 获取当前主题
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-
-    return render_template(
-        f'themes/{current_theme}/tag_detail.html',
+    return themed(
+        'tag_detail.html',
         tag=tag,
         websites=websites
     )
@@ -236,43 +265,54 @@ def switch_theme(theme_name):
 
 
 @bp.route('/about')
+@cache.cached(timeout=300, make_cache_key=_view_cache_key)
 def about():
     """关于页面"""
     settings = SiteSettings.get_settings()
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
 
-    return render_template(
-        f'themes/{current_theme}/about.html',
+    return themed(
+        'about.html',
         settings=settings
     )
 
 
 @bp.route('/stats')
+@cache.cached(timeout=60, make_cache_key=_view_cache_key)
 def stats():
     """统计页面"""
-    # 基本统计
-    total_categories = Category.query.filter_by(is_public=True, is_visible=True).count()
-    total_websites = Website.query.filter_by(is_public=True, is_active=True).count()
-    total_tags = Tag.query.count()
-    total_clicks = db.session.query(db.func.sum(Website.click_count)).scalar() or 0
+    # 基本统计（四个标量查询合并为一条语句，单次往返）
+    total_categories, total_websites, total_tags, total_clicks = db.session.execute(
+        select(
+            select(func.count()).select_from(Category).where(
+                Category.is_public == True, Category.is_visible == True
+            ).scalar_subquery(),
+            select(func.count()).select_from(Website).where(
+                Website.is_public == True, Website.is_active == True
+            ).scalar_subquery(),
+            select(func.count()).select_from(Tag).scalar_subquery(),
+            select(func.coalesce(func.sum(Website.click_count), 0)).scalar_subquery(),
+        )
+    ).one()
 
     # 热门网站
-    popular_websites = Website.query.filter_by(
+    popular_websites = Website.query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).filter_by(
         is_public=True, is_active=True
     ).order_by(Website.click_count.desc()).limit(10).all()
 
     # 最近添加
-    recent_websites = Website.query.filter_by(
+    recent_websites = Website.query.options(
+        load_only(*_WEBSITE_LIST_COLS)
+    ).filter_by(
         is_public=True, is_active=True
     ).order_by(Website.created_at.desc()).limit(10).all()
 
     # 热门标签
     popular_tags = Tag.query.order_by(Tag.usage_count.desc()).limit(20).all()
 
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-
-    return render_template(
-        f'themes/{current_theme}/stats.html',
+    return themed(
+        'stats.html',
         total_categories=total_categories,
         total_websites=total_websites,
         total_tags=total_tags,
@@ -287,13 +327,11 @@ def stats():
 @bp.app_errorhandler(404)
 def not_found_error(error):
     """404错误处理"""
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-    return render_template(f'themes/{current_theme}/errors/404.html'), 404
+    return themed('errors/404.html'), 404
 
 
 @bp.app_errorhandler(500)
 def internal_error(error):
     """500错误处理"""
     db.session.rollback()
-    current_theme = session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
-    return render_template(f'themes/{current_theme}/errors/500.html'), 500
\ No newline at end of file
+    return themed('errors/500.html'), 500
\ No newline at end of file
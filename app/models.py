@@ -4,8 +4,9 @@ OneBookNav 数据模型
 融合BookNav和OneNav的优点，创建功能强大的导航应用数据模型
 """
 import json
-import secrets
+import os
 import string
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import List, Dict, Any, Optional
@@ -14,11 +15,17 @@ from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import event, func
+from sqlalchemy import event, func, inspect, text
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, attributes, joinedload, validates
 
 from app import db
 
+try:
+    import orjson
+except ImportError:  # 未安装时回退标准库json
+    orjson = None
+
 
 class UserRole(Enum):
     """用户角色枚举"""
@@ -49,7 +56,37 @@ class TimestampMixin:
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
-class User(UserMixin, TimestampMixin, db.Model):
+def _conv(value):
+    """列值转为JSON安全类型
+
+    orjson可原生序列化datetime（由应用注册的JSON提供器处理），
+    免去逐字段isoformat；未安装时仍转为ISO字符串。
+    """
+    if isinstance(value, datetime):
+        return value if orjson is not None else value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class SerializableMixin:
+    """列序列化混入类
+
+    已加载的列值直接从实例__dict__读取，绕开逐列的descriptor访问；
+    未加载的列回退getattr触发正常加载。子类to_dict在此基础上补充派生字段。
+    """
+
+    def _column_dict(self, fields=None) -> Dict[str, Any]:
+        state = self.__dict__
+        columns = fields or inspect(type(self)).columns.keys()
+        data = {}
+        for key in columns:
+            value = state[key] if key in state else getattr(self, key)
+            data[key] = _conv(value)
+        return data
+
+
+class User(UserMixin, SerializableMixin, TimestampMixin, db.Model):
     """用户模型"""
     __tablename__ = 'user'
 
@@ -61,6 +98,8 @@ class User(UserMixin, TimestampMixin, db.Model):
     # 用户信息
     nickname = db.Column(db.String(100))
     avatar = db.Column(db.String(255))
+    avatar_hash = db.Column(db.String(32))  # Gravatar摘要，email写入时预计算
+    avatar_url_64 = db.Column(db.String(255))  # 默认尺寸Gravatar地址，序列化直读
     bio = db.Column(db.Text)
 
     # 状态字段
@@ -82,6 +121,12 @@ class User(UserMixin, TimestampMixin, db.Model):
     websites = db.relationship('Website', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
     invitation_codes = db.relationship('InvitationCode', backref='creator', lazy='dynamic')
 
+    # 函数索引：支撑大小写不敏感的登录与唯一性查询
+    __table_args__ = (
+        db.Index('ix_user_username_lower', func.lower(username)),
+        db.Index('ix_user_email_lower', func.lower(email)),
+    )
+
     def set_password(self, password: str):
         """设置密码"""
         self.password_hash = generate_password_hash(password)
@@ -114,36 +159,43 @@ class User(UserMixin, TimestampMixin, db.Model):
             return True
         return website.user_id == self.id
 
+    @validates('email')
+    def _compute_avatar_hash(self, key, email):
+        """邮箱写入时预计算Gravatar摘要及默认尺寸地址，读取路径零计算"""
+        if email:
+            import hashlib
+            self.avatar_hash = hashlib.md5(email.lower().encode('utf-8')).hexdigest()
+            self.avatar_url_64 = (
+                f'https://www.gravatar.com/avatar/{self.avatar_hash}?d=identicon&s=64'
+            )
+        return email
+
     def get_avatar_url(self, size: int = 64) -> str:
         """获取头像URL"""
         if self.avatar:
             return self.avatar
-        # 默认头像或Gravatar
-        import hashlib
-        digest = hashlib.md5(self.email.lower().encode('utf-8')).hexdigest()
+        # 默认头像或Gravatar（旧数据未回填摘要时现算一次）
+        digest = self.avatar_hash
+        if not digest:
+            import hashlib
+            digest = hashlib.md5(self.email.lower().encode('utf-8')).hexdigest()
         return f'https://www.gravatar.com/avatar/{digest}?d=identicon&s={size}'
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'nickname': self.nickname,
-            'avatar': self.get_avatar_url(),
-            'bio': self.bio,
-            'role': self.role.value,
-            'is_active': self.is_active,
-            'email_confirmed': self.email_confirmed,
-            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
-            'created_at': self.created_at.isoformat()
-        }
+        data = self._column_dict((
+            'id', 'username', 'email', 'nickname', 'bio', 'role',
+            'is_active', 'email_confirmed', 'last_seen', 'created_at',
+        ))
+        # 预存的默认尺寸地址直读，旧数据回退现算
+        data['avatar'] = self.avatar or self.avatar_url_64 or self.get_avatar_url()
+        return data
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 
-class Category(TimestampMixin, db.Model):
+class Category(SerializableMixin, TimestampMixin, db.Model):
     """分类模型"""
     __tablename__ = 'category'
 
@@ -162,37 +214,215 @@ class Category(TimestampMixin, db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     parent_id = db.Column(db.Integer, db.ForeignKey('category.id'))
 
+    # 物化路径（形如"1/4/17/"，事件监听器维护），
+    # 祖先/后代判断降为字符串操作
+    path = db.Column(db.String(255), index=True)
+
+    # 冗余的有效网站计数（事件监听器维护），读取为普通属性访问
+    website_count_stored = db.Column('website_count', db.Integer, default=0, nullable=False)
+
     # 关联关系
     children = db.relationship('Category', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
     websites = db.relationship('Website', backref='category', lazy='dynamic', cascade='all, delete-orphan')
 
+    # 复合索引：用户分类树按父级+排序的列表查询
+    __table_args__ = (
+        db.Index('ix_category_user_parent_sort',
+                 'user_id', 'parent_id', 'sort_order'),
+    )
+
     @hybrid_property
     def website_count(self):
-        """网站数量"""
+        """网站数量
+
+        优先级：视图预取的计数缓存 > 冗余计数列 > 现场COUNT
+        （计数列由事件监听器维护，query_with_counts可用于回填校正）。
+        """
+        if '_website_count_cache' in self.__dict__:
+            return self._website_count_cache
+        if self.website_count_stored is not None:
+            return self.website_count_stored
         return self.websites.filter_by(is_active=True).count()
 
+    @property
+    def visible_children(self) -> List['Category']:
+        """可见子分类（优先读批量预取的缓存，未预取时现查）
+
+        与website_count同样的缓存优先级约定，模板/序列化
+        统一经此访问即可吃到preload_children_and_websites的预取结果。
+        """
+        if '_children_cache' in self.__dict__:
+            return self._children_cache
+        return (self.children.filter_by(is_visible=True)
+                .order_by(Category.sort_order).all())
+
+    @property
+    def visible_websites(self) -> List['Website']:
+        """分类下可见的有效网站（优先读批量预取的缓存，未预取时现查）
+
+        未预取时回退为仅公开网站，浏览者相关的可见性
+        由preload_children_and_websites(viewer_id=...)负责。
+        """
+        if '_websites_cache' in self.__dict__:
+            return self._websites_cache
+        return (self.websites.filter_by(is_active=True, is_public=True)
+                .order_by(Website.sort_order, Website.created_at.desc()).all())
+
+    @classmethod
+    def query_with_counts(cls, query=None) -> List['Category']:
+        """执行分类查询并批量预取各分类的有效网站数
+
+        一条GROUP BY代替每个分类实例的COUNT查询，
+        结果缓存在实例的_website_count_cache属性上供website_count读取。
+        """
+        query = query if query is not None else cls.query
+        categories = query.all()
+        ids = [category.id for category in categories]
+        if not ids:
+            return categories
+
+        counts = dict(db.session.execute(
+            db.select(Website.category_id, func.count())
+            .where(Website.category_id.in_(ids), Website.is_active == True)
+            .group_by(Website.category_id)
+        ).all())
+        for category in categories:
+            category._website_count_cache = counts.get(category.id, 0)
+        return categories
+
+    @classmethod
+    def build_tree(cls, user_id: Optional[int] = None) -> List['Category']:
+        """一次查询构建整棵分类树
+
+        parent_id->children映射只建一次并挂到各节点的_children_cache，
+        之后整树遍历（含get_all_children）不再触发任何查询。
+        渲染完整树形结构的调用方应先调用本方法。
+        返回根分类列表（parent_id为None）。
+        """
+        query = cls.query
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        rows = query.order_by(cls.sort_order).all()
+
+        children_map = {}
+        for category in rows:
+            children_map.setdefault(category.parent_id, []).append(category)
+        for category in rows:
+            category._children_cache = children_map.get(category.id, [])
+        return children_map.get(None, [])
+
+    @classmethod
+    def preload_children_and_websites(cls, categories: List['Category'],
+                                      viewer_id: Optional[int] = None) -> List['Category']:
+        """为一批分类批量预取可见子分类与网站
+
+        children/websites均为dynamic关系，无法使用selectinload；
+        这里用两条IN查询代替模板渲染时的逐分类惰性查询，
+        结果缓存在实例的_children_cache/_websites_cache属性上，
+        经visible_children/visible_websites访问器读取。
+        viewer_id为浏览者ID，None表示只取公开网站。
+        """
+        ids = [category.id for category in categories]
+        if not ids:
+            return categories
+
+        children = cls.query.filter(
+            cls.parent_id.in_(ids), cls.is_visible == True
+        ).order_by(cls.sort_order).all()
+
+        visible = Website.is_active == True
+        if viewer_id is None:
+            visible = db.and_(visible, Website.is_public == True)
+        else:
+            visible = db.and_(
+                visible,
+                db.or_(Website.is_public == True, Website.user_id == viewer_id)
+            )
+        websites = Website.query.filter(
+            Website.category_id.in_(ids), visible
+        ).order_by(Website.sort_order, Website.created_at.desc()).all()
+
+        children_map = {}
+        for child in children:
+            children_map.setdefault(child.parent_id, []).append(child)
+        websites_map = {}
+        for website in websites:
+            websites_map.setdefault(website.category_id, []).append(website)
+
+        for category in categories:
+            category._children_cache = children_map.get(category.id, [])
+            category._websites_cache = websites_map.get(category.id, [])
+        return categories
+
+    @classmethod
+    def descendants(cls, root_id: int) -> List[int]:
+        """返回某分类全部后代的id（单条递归CTE，一次往返取整棵子树）"""
+        rows = db.session.execute(
+            text(
+                "WITH RECURSIVE cte(id) AS ("
+                " SELECT id FROM category WHERE parent_id = :root"
+                " UNION ALL"
+                " SELECT c.id FROM category c JOIN cte ON c.parent_id = cte.id"
+                ") SELECT id FROM cte"
+            ),
+            {'root': root_id}
+        )
+        return [row[0] for row in rows]
+
     def get_all_children(self) -> List['Category']:
-        """获取所有子分类（递归）"""
-        children = []
-        for child in self.children:
-            children.append(child)
-            children.extend(child.get_all_children())
-        return children
+        """获取所有子分类
+
+        build_tree/preload预建的_children_cache存在时用显式栈迭代遍历，
+        零查询且无递归深度限制；否则退回单条递归CTE。
+        """
+        if '_children_cache' in self.__dict__:
+            children = []
+            stack = list(self._children_cache)
+            while stack:
+                node = stack.pop()
+                children.append(node)
+                stack.extend(node.__dict__.get('_children_cache', ()))
+            return children
+
+        ids = Category.descendants(self.id)
+        if not ids:
+            return []
+        return Category.query.filter(Category.id.in_(ids)).all()
 
     def get_path(self) -> str:
-        """获取分类路径"""
-        path = [self.name]
-        parent = self.parent
-        while parent:
-            path.insert(0, parent.name)
-            parent = parent.parent
-        return ' / '.join(path)
+        """获取分类路径
+
+        优先用物化路径的id序列一次IN查询取回名称；
+        旧数据未回填path时退回向上递归CTE。
+        """
+        if self.path:
+            ids = [int(part) for part in self.path.split('/') if part]
+            names = dict(db.session.execute(
+                db.select(Category.id, Category.name).where(Category.id.in_(ids))
+            ).all())
+            return ' / '.join(names[i] for i in ids if i in names)
+
+        rows = db.session.execute(
+            text(
+                "WITH RECURSIVE cte(id, parent_id, name, depth) AS ("
+                " SELECT id, parent_id, name, 0 FROM category WHERE id = :cid"
+                " UNION ALL"
+                " SELECT c.id, c.parent_id, c.name, cte.depth + 1"
+                " FROM category c JOIN cte ON c.id = cte.parent_id"
+                ") SELECT name FROM cte ORDER BY depth DESC"
+            ),
+            {'cid': self.id}
+        )
+        return ' / '.join(row[0] for row in rows)
 
     def can_be_parent_of(self, category) -> bool:
         """是否可以作为某分类的父分类"""
         if category.id == self.id:
             return False
-        # 检查是否会形成循环
+        # 物化路径包含候选分类id即意味着成环，一次字符串判断完成检测
+        if self.path:
+            return f'/{category.id}/' not in f'/{self.path}'
+        # 旧数据未回填path时退回逐级向上检查
         parent = self.parent
         while parent:
             if parent.id == category.id:
@@ -202,23 +432,19 @@ class Category(TimestampMixin, db.Model):
 
     def to_dict(self, include_websites: bool = False) -> Dict[str, Any]:
         """转换为字典"""
-        data = {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'icon': self.icon,
-            'color': self.color,
-            'sort_order': self.sort_order,
-            'is_visible': self.is_visible,
-            'is_public': self.is_public,
-            'parent_id': self.parent_id,
-            'website_count': self.website_count,
-            'path': self.get_path(),
-            'created_at': self.created_at.isoformat()
-        }
+        data = self._column_dict((
+            'id', 'name', 'description', 'icon', 'color', 'sort_order',
+            'is_visible', 'is_public', 'parent_id', 'created_at',
+        ))
+        data['website_count'] = self.website_count
+        data['path'] = self.get_path()
 
         if include_websites:
-            data['websites'] = [w.to_dict() for w in self.websites.filter_by(is_active=True).all()]
+            if '_websites_cache' in self.__dict__:
+                # preload_children_and_websites已批量取回，不再逐分类查询
+                data['websites'] = [w.to_dict() for w in self._websites_cache]
+            else:
+                data['websites'] = [w.to_dict() for w in self.websites.filter_by(is_active=True).all()]
 
         return data
 
@@ -226,13 +452,14 @@ class Category(TimestampMixin, db.Model):
         return f'<Category {self.name}>'
 
 
-class Website(TimestampMixin, db.Model):
+class Website(SerializableMixin, TimestampMixin, db.Model):
     """网站模型"""
     __tablename__ = 'website'
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     url = db.Column(db.String(500), nullable=False)
+    domain = db.Column(db.String(255), index=True)  # url写入时解析，序列化免逐行urlparse
     description = db.Column(db.Text)
     icon = db.Column(db.String(255))
 
@@ -260,19 +487,102 @@ class Website(TimestampMixin, db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
 
-    # 关联关系
-    tags = db.relationship('Tag', secondary=website_tags, backref=db.backref('websites', lazy='dynamic'))
+    # 关联关系（标签selectin批量加载，列表场景下一条IN查询取回全部标签）
+    tags = db.relationship('Tag', secondary=website_tags, lazy='selectin',
+                           backref=db.backref('websites', lazy='dynamic'))
+
+    # 复合索引：对齐各列表端点的过滤+排序形态，范围读免全表扫描
+    __table_args__ = (
+        # 首页/统计页的热门与最新列表
+        db.Index('ix_website_public_active_clicks',
+                 'is_public', 'is_active', db.desc('click_count')),
+        db.Index('ix_website_public_active_created',
+                 'is_public', 'is_active', db.desc('created_at')),
+        # 用户后台的我的网站列表
+        db.Index('ix_website_user_active_sort',
+                 'user_id', 'is_active', 'sort_order'),
+        # 分类详情页的网站列表
+        db.Index('ix_website_category_active',
+                 'category_id', 'is_active'),
+        # 死链检查器的"最久未检查"扫描
+        db.Index('ix_website_status_checked',
+                 'link_status', 'last_checked_at'),
+    )
+
+    @classmethod
+    def public_rows(cls, category_id: Optional[int] = None):
+        """公开导航列表的轻量行查询
+
+        只选取渲染所需的列并连取分类名，返回dict-like的RowMapping列表，
+        完全绕开ORM实例构建与identity map。需要标签等完整结构时
+        仍应走list_query的ORM路径。
+        """
+        stmt = (
+            db.select(
+                cls.id, cls.title, cls.url, cls.icon,
+                cls.click_count, Category.name.label('category_name')
+            )
+            .join(Category, cls.category_id == Category.id)
+            .where(cls.is_active == True, cls.is_public == True)
+            .order_by(cls.sort_order, cls.created_at.desc())
+        )
+        if category_id is not None:
+            stmt = stmt.where(cls.category_id == category_id)
+        return db.session.execute(stmt).mappings().all()
+
+    @classmethod
+    def list_query(cls):
+        """列表端点的标准查询：预取分类名，配合tags的selectin加载，
+        to_dict序列化不再逐行触发惰性查询"""
+        return cls.query.options(
+            joinedload(cls.category).load_only(Category.name),
+        )
+
+    @classmethod
+    def bump_click(cls, website_id: int, clicks: int = 1):
+        """原子累加点击计数（单条UPDATE，计数在SQL侧自增，无读-改-写竞态）"""
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id == website_id)
+            .values(
+                click_count=cls.click_count + clicks,
+                last_clicked_at=datetime.utcnow()
+            )
+        )
+
+    @classmethod
+    def record_link_check(cls, website_id: int, status: 'LinkStatus',
+                          response_time: Optional[float] = None):
+        """原子写入链接检查结果（check_count自增在SQL侧完成）"""
+        values = {
+            'link_status': status,
+            'last_checked_at': datetime.utcnow(),
+            'check_count': cls.check_count + 1,
+        }
+        if response_time is not None:
+            values['response_time'] = response_time
+        db.session.execute(
+            db.update(cls).where(cls.id == website_id).values(**values)
+        )
 
     def increment_click(self):
-        """增加点击次数"""
-        self.click_count += 1
-        self.last_clicked_at = datetime.utcnow()
+        """增加点击次数（bump_click的实例包装）"""
+        Website.bump_click(self.id)
+
+    @validates('url')
+    def _extract_domain(self, key, url):
+        """URL写入时解析域名存入domain列"""
+        if url:
+            from urllib.parse import urlparse
+            self.domain = urlparse(url).netloc
+        return url
 
     def get_domain(self) -> str:
-        """获取域名"""
+        """获取域名（旧数据未回填domain时现场解析）"""
+        if self.domain:
+            return self.domain
         from urllib.parse import urlparse
-        parsed = urlparse(self.url)
-        return parsed.netloc
+        return urlparse(self.url).netloc
 
     def get_favicon_url(self) -> str:
         """获取网站图标URL"""
@@ -285,12 +595,8 @@ class Website(TimestampMixin, db.Model):
         return '/static/img/default-favicon.png'
 
     def update_link_status(self, status: LinkStatus, response_time: Optional[float] = None):
-        """更新链接状态"""
-        self.link_status = status
-        self.last_checked_at = datetime.utcnow()
-        self.check_count += 1
-        if response_time is not None:
-            self.response_time = response_time
+        """更新链接状态（record_link_check的实例包装）"""
+        Website.record_link_check(self.id, status, response_time)
 
     def is_recently_checked(self, hours: int = 24) -> bool:
         """是否最近检查过"""
@@ -300,33 +606,22 @@ class Website(TimestampMixin, db.Model):
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'url': self.url,
-            'description': self.description,
-            'icon': self.get_favicon_url(),
-            'keywords': self.keywords,
-            'is_active': self.is_active,
-            'is_public': self.is_public,
-            'is_featured': self.is_featured,
-            'sort_order': self.sort_order,
-            'click_count': self.click_count,
-            'last_clicked_at': self.last_clicked_at.isoformat() if self.last_clicked_at else None,
-            'link_status': self.link_status.value,
-            'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None,
-            'response_time': self.response_time,
-            'category_id': self.category_id,
-            'category_name': self.category.name if self.category else None,
-            'tags': [tag.name for tag in self.tags],
-            'created_at': self.created_at.isoformat()
-        }
+        data = self._column_dict((
+            'id', 'title', 'url', 'description', 'keywords',
+            'is_active', 'is_public', 'is_featured', 'sort_order',
+            'click_count', 'last_clicked_at', 'link_status',
+            'last_checked_at', 'response_time', 'category_id', 'created_at',
+        ))
+        data['icon'] = self.get_favicon_url()
+        data['category_name'] = self.category.name if self.category else None
+        data['tags'] = [tag.name for tag in self.tags]
+        return data
 
     def __repr__(self):
         return f'<Website {self.title}>'
 
 
-class Tag(TimestampMixin, db.Model):
+class Tag(SerializableMixin, TimestampMixin, db.Model):
     """标签模型"""
     __tablename__ = 'tag'
 
@@ -337,29 +632,34 @@ class Tag(TimestampMixin, db.Model):
 
     # 统计字段
     usage_count = db.Column(db.Integer, default=0, nullable=False)
+    # 冗余的网站计数（事件监听器维护）
+    website_count_stored = db.Column('website_count', db.Integer, default=0, nullable=False)
 
     @hybrid_property
     def website_count(self):
-        """网站数量"""
+        """网站数量
+
+        优先级：视图预取的计数缓存 > 冗余计数列 > 现场COUNT。
+        """
+        if '_website_count_cache' in self.__dict__:
+            return self._website_count_cache
+        if self.website_count_stored is not None:
+            return self.website_count_stored
         return self.websites.filter_by(is_active=True).count()
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'color': self.color,
-            'description': self.description,
-            'website_count': self.website_count,
-            'usage_count': self.usage_count,
-            'created_at': self.created_at.isoformat()
-        }
+        data = self._column_dict((
+            'id', 'name', 'color', 'description', 'usage_count', 'created_at',
+        ))
+        data['website_count'] = self.website_count
+        return data
 
     def __repr__(self):
         return f'<Tag {self.name}>'
 
 
-class InvitationCode(TimestampMixin, db.Model):
+class InvitationCode(SerializableMixin, TimestampMixin, db.Model):
     """邀请码模型"""
     __tablename__ = 'invitation_code'
 
@@ -378,9 +678,21 @@ class InvitationCode(TimestampMixin, db.Model):
 
     @staticmethod
     def generate_code(length: int = 8) -> str:
-        """生成邀请码"""
+        """生成邀请码（一次取足随机字节，免逐字符secrets.choice）"""
         alphabet = string.ascii_uppercase + string.digits
-        return ''.join(secrets.choice(alphabet) for _ in range(length))
+        size = len(alphabet)
+        return ''.join(alphabet[b % size] for b in os.urandom(length))
+
+    @staticmethod
+    def generate_codes(count: int, length: int = 8) -> List[str]:
+        """批量生成邀请码（单次系统熵读取后切片）"""
+        alphabet = string.ascii_uppercase + string.digits
+        size = len(alphabet)
+        buf = os.urandom(count * length)
+        return [
+            ''.join(alphabet[b % size] for b in buf[i * length:(i + 1) * length])
+            for i in range(count)
+        ]
 
     def is_valid(self) -> bool:
         """是否有效"""
@@ -401,22 +713,23 @@ class InvitationCode(TimestampMixin, db.Model):
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'code': self.code,
-            'is_used': self.is_used,
-            'used_at': self.used_at.isoformat() if self.used_at else None,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'creator_id': self.creator_id,
-            'used_by_id': self.used_by_id,
-            'created_at': self.created_at.isoformat()
-        }
+        return self._column_dict((
+            'id', 'code', 'is_used', 'used_at', 'expires_at',
+            'creator_id', 'used_by_id', 'created_at',
+        ))
 
     def __repr__(self):
         return f'<InvitationCode {self.code}>'
 
 
-class SiteSettings(TimestampMixin, db.Model):
+# 进程内设置缓存：key -> (过期时间截止点, 解析后的值)
+# 设置读多写少，短TTL即可消除每个请求的配置查询
+_SETTINGS_CACHE: Dict[str, Any] = {}
+_SETTINGS_TTL = 60
+_SETTINGS_ALL_KEY = '__all__'
+
+
+class SiteSettings(SerializableMixin, TimestampMixin, db.Model):
     """网站设置模型"""
     __tablename__ = 'site_settings'
 
@@ -424,29 +737,61 @@ class SiteSettings(TimestampMixin, db.Model):
     key = db.Column(db.String(100), unique=True, nullable=False, index=True)
     value = db.Column(db.Text)
     value_type = db.Column(db.String(20), default='string', nullable=False)  # string, int, bool, json
+    # 类型化列（写入时填充，读取免去逐次字符串解析）
+    value_bool = db.Column(db.Boolean)
+    value_int = db.Column(db.Integer)
+    value_json = db.Column(db.JSON)
     description = db.Column(db.Text)
     category = db.Column(db.String(50), default='general')
     is_public = db.Column(db.Boolean, default=False, nullable=False)
 
     @classmethod
     def get_settings(cls) -> Dict[str, Any]:
-        """获取所有设置"""
-        settings = {}
-        for setting in cls.query.all():
-            settings[setting.key] = setting.get_value()
-        return settings
+        """获取所有设置（进程内TTL缓存）
+
+        缓存未命中时走驱动级查询直接取三列，
+        不实例化ORM对象——该调用几乎每个请求都会触达。
+        """
+        entry = _SETTINGS_CACHE.get(_SETTINGS_ALL_KEY)
+        if entry and entry[0] > time.monotonic():
+            return dict(entry[1])
+
+        rows = db.session.execute(
+            text("SELECT key, value, value_type FROM site_settings")
+        ).all()
+        settings = {key: cls._parse_value(value, value_type)
+                    for key, value, value_type in rows}
+        _SETTINGS_CACHE[_SETTINGS_ALL_KEY] = (time.monotonic() + _SETTINGS_TTL, settings)
+        return dict(settings)
 
     @classmethod
-    def get_value(cls, key: str, default=None):
-        """获取设置值"""
-        setting = cls.query.filter_by(key=key).first()
-        if setting:
-            return setting.get_value()
-        return default
+    def get_cached_value(cls, key: str, default=None):
+        """获取设置值（进程内TTL缓存）"""
+        entry = _SETTINGS_CACHE.get(key)
+        if entry and entry[0] > time.monotonic():
+            value = entry[1]
+        else:
+            setting = cls.query.filter_by(key=key).first()
+            value = setting.get_value() if setting else None
+            _SETTINGS_CACHE[key] = (time.monotonic() + _SETTINGS_TTL, value)
+        return default if value is None else value
 
     @classmethod
-    def set_value(cls, key: str, value, value_type: str = 'string', description: str = '', category: str = 'general'):
-        """设置值"""
+    def invalidate(cls, key: Optional[str] = None):
+        """清除进程内设置缓存（写入路径调用）"""
+        if key is None:
+            _SETTINGS_CACHE.clear()
+        else:
+            _SETTINGS_CACHE.pop(key, None)
+            _SETTINGS_CACHE.pop(_SETTINGS_ALL_KEY, None)
+
+    @classmethod
+    def update_setting(cls, key: str, value, value_type: str = 'string', description: str = '', category: str = 'general'):
+        """按键写入设置并清除缓存
+
+        原名set_value被下方同名实例方法遮蔽而不可调用，
+        缓存清除逻辑因此从未执行，故改名恢复（参照get_cached_value）。
+        """
         setting = cls.query.filter_by(key=key).first()
         if not setting:
             setting = cls(key=key, value_type=value_type, description=description, category=category)
@@ -455,48 +800,73 @@ class SiteSettings(TimestampMixin, db.Model):
         setting.set_value(value)
         db.session.commit()
 
-    def get_value(self):
-        """获取转换后的值"""
-        if self.value is None:
+        # 设置变更后清除缓存
+        cls.invalidate(key)
+        from app.utils.settings_cache import invalidate_settings_cache
+        invalidate_settings_cache()
+
+    @staticmethod
+    def _parse_value(value: Optional[str], value_type: str):
+        """按声明类型解析存储的字符串值"""
+        if value is None:
             return None
 
-        if self.value_type == 'int':
-            return int(self.value)
-        elif self.value_type == 'bool':
-            return self.value.lower() in ('true', '1', 'yes', 'on')
-        elif self.value_type == 'json':
+        if value_type == 'int':
+            return int(value)
+        elif value_type == 'bool':
+            return value.lower() in ('true', '1', 'yes', 'on')
+        elif value_type == 'json':
             try:
-                return json.loads(self.value)
-            except (json.JSONDecodeError, TypeError):
+                if orjson is not None:
+                    return orjson.loads(value)
+                return json.loads(value)
+            except (ValueError, TypeError):
                 return {}
         else:
-            return self.value
+            return value
+
+    def get_value(self):
+        """获取转换后的值（类型化列直读，旧数据回退字符串解析）"""
+        if self.value_type == 'bool' and self.value_bool is not None:
+            return self.value_bool
+        if self.value_type == 'int' and self.value_int is not None:
+            return self.value_int
+        if self.value_type == 'json' and self.value_json is not None:
+            return self.value_json
+        return self._parse_value(self.value, self.value_type)
 
     def set_value(self, value):
-        """设置值"""
+        """设置值（字符串列与类型化列同步写入）"""
         if self.value_type == 'json':
-            self.value = json.dumps(value, ensure_ascii=False)
+            if orjson is not None:
+                self.value = orjson.dumps(value).decode('utf-8')
+            else:
+                self.value = json.dumps(value, ensure_ascii=False)
+            self.value_json = value
+        elif self.value_type == 'bool':
+            self.value = str(value)
+            self.value_bool = (value if isinstance(value, bool)
+                               else str(value).lower() in ('true', '1', 'yes', 'on'))
+        elif self.value_type == 'int':
+            self.value = str(value)
+            self.value_int = int(value)
         else:
             self.value = str(value)
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'key': self.key,
-            'value': self.get_value(),
-            'value_type': self.value_type,
-            'description': self.description,
-            'category': self.category,
-            'is_public': self.is_public,
-            'created_at': self.created_at.isoformat()
-        }
+        data = self._column_dict((
+            'id', 'key', 'value_type', 'description', 'category',
+            'is_public', 'created_at',
+        ))
+        data['value'] = self.get_value()
+        return data
 
     def __repr__(self):
         return f'<SiteSettings {self.key}>'
 
 
-class DeadlinkCheck(TimestampMixin, db.Model):
+class DeadlinkCheck(SerializableMixin, TimestampMixin, db.Model):
     """死链检查记录模型"""
     __tablename__ = 'deadlink_check'
 
@@ -513,24 +883,97 @@ class DeadlinkCheck(TimestampMixin, db.Model):
     # 关联关系
     website = db.relationship('Website', backref='check_records')
 
+    @classmethod
+    def bulk_insert(cls, records: List[Dict[str, Any]]):
+        """批量写入检查记录（Core executemany，绕开逐行ORM开销）
+
+        records为普通字典列表；链接检查器应累积一批（如500条）后调用。
+        """
+        if not records:
+            return
+        db.session.execute(cls.__table__.insert(), records)
+        db.session.commit()
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        return {
-            'id': self.id,
-            'url': self.url,
-            'status_code': self.status_code,
-            'response_time': self.response_time,
-            'error_message': self.error_message,
-            'is_accessible': self.is_accessible,
-            'website_id': self.website_id,
-            'created_at': self.created_at.isoformat()
-        }
+        return self._column_dict((
+            'id', 'url', 'status_code', 'response_time', 'error_message',
+            'is_accessible', 'website_id', 'created_at',
+        ))
 
     def __repr__(self):
         return f'<DeadlinkCheck {self.url}>'
 
 
 # 事件监听器
+@event.listens_for(Category, 'after_insert')
+def set_category_path(mapper, connection, target):
+    """插入后物化分类路径（父路径 + 自身id + '/'）"""
+    parent_path = ''
+    if target.parent_id:
+        row = connection.execute(
+            text("SELECT path FROM category WHERE id = :pid"),
+            {'pid': target.parent_id}
+        ).first()
+        parent_path = (row[0] or '') if row else ''
+    connection.execute(
+        text("UPDATE category SET path = :path WHERE id = :cid"),
+        {'path': f'{parent_path}{target.id}/', 'cid': target.id}
+    )
+
+
+@event.listens_for(Category, 'after_update')
+def update_category_path(mapper, connection, target):
+    """分类移动（parent_id变更）时重写整棵子树的物化路径"""
+    from sqlalchemy.orm import attributes
+    if not attributes.get_history(target, 'parent_id').has_changes():
+        return
+
+    row = connection.execute(
+        text("SELECT path FROM category WHERE id = :cid"), {'cid': target.id}
+    ).first()
+    old_path = row[0] if row else None
+
+    parent_path = ''
+    if target.parent_id:
+        prow = connection.execute(
+            text("SELECT path FROM category WHERE id = :pid"),
+            {'pid': target.parent_id}
+        ).first()
+        parent_path = (prow[0] or '') if prow else ''
+    new_path = f'{parent_path}{target.id}/'
+
+    if old_path:
+        # 一条UPDATE改写自身及全部后代的路径前缀；
+        # 必须锚定在开头替换（substr），REPLACE会误伤路径中间
+        # 再次出现旧前缀的后代（如"1/12/"下挂"1/12/112/"）
+        connection.execute(
+            text("UPDATE category SET path = :new || substr(path, length(:old) + 1) "
+                 "WHERE path LIKE :prefix"),
+            {'old': old_path, 'new': new_path, 'prefix': f'{old_path}%'}
+        )
+    else:
+        connection.execute(
+            text("UPDATE category SET path = :path WHERE id = :cid"),
+            {'path': new_path, 'cid': target.id}
+        )
+
+
+@event.listens_for(SiteSettings, 'after_insert')
+@event.listens_for(SiteSettings, 'after_update')
+@event.listens_for(SiteSettings, 'after_delete')
+def invalidate_settings_on_change(mapper, connection, target):
+    """设置行经ORM写入后自动清除设置缓存
+
+    update_setting之外的修改路径（如管理后台直接改实例）
+    也能让get_settings/get_cached_value及时看到新值；
+    Flask-Caching的memoize层同样在此一并失效。
+    """
+    SiteSettings.invalidate(target.key)
+    from app.utils.settings_cache import invalidate_settings_cache
+    invalidate_settings_cache()
+
+
 @event.listens_for(Tag, 'before_delete')
 def update_tag_usage_count(mapper, connection, target):
     """删除标签前更新使用计数"""
@@ -540,9 +983,153 @@ def update_tag_usage_count(mapper, connection, target):
 
 @event.listens_for(Website, 'after_insert')
 def update_category_website_count(mapper, connection, target):
-    """网站插入后更新分类的网站计数"""
-    # SQLAlchemy会自动处理这个关系
-    pass
+    """网站插入后维护分类的冗余网站计数"""
+    if target.is_active and target.category_id:
+        connection.execute(
+            text("UPDATE category SET website_count = website_count + 1 "
+                 "WHERE id = :cid"),
+            {'cid': target.category_id}
+        )
+
+
+@event.listens_for(Website, 'before_delete')
+def decrement_counts_on_website_delete(mapper, connection, target):
+    """网站删除前回减分类与标签的冗余计数（关联行尚未级联删除）
+
+    与插入/更新路径一致，只有有效(is_active)网站计入计数。
+    """
+    if not target.is_active:
+        return
+    if target.category_id:
+        connection.execute(
+            text("UPDATE category SET website_count = website_count - 1 "
+                 "WHERE id = :cid AND website_count > 0"),
+            {'cid': target.category_id}
+        )
+    connection.execute(
+        text("UPDATE tag SET website_count = website_count - 1 "
+             "WHERE website_count > 0 AND id IN "
+             "(SELECT tag_id FROM website_tags WHERE website_id = :wid)"),
+        {'wid': target.id}
+    )
+
+
+@event.listens_for(Website, 'before_update')
+def adjust_category_count_on_website_update(mapper, connection, target):
+    """网站启用状态或所属分类变更时调整冗余计数
+
+    在before_update阶段处理，数据库此时还保留旧行：
+    过期/未加载实例上直接赋值时history不含旧值（deleted为空），
+    需回查数据库取真实旧值，而不能当作未变更跳过。
+    """
+    active_hist = attributes.get_history(target, 'is_active')
+    category_hist = attributes.get_history(target, 'category_id')
+    if not active_hist.has_changes() and not category_hist.has_changes():
+        return
+
+    was_active = active_hist.deleted[0] if active_hist.deleted else target.is_active
+    old_category = category_hist.deleted[0] if category_hist.deleted else target.category_id
+    if ((active_hist.has_changes() and not active_hist.deleted) or
+            (category_hist.has_changes() and not category_hist.deleted)):
+        row = connection.execute(
+            text("SELECT is_active, category_id FROM website WHERE id = :wid"),
+            {'wid': target.id}
+        ).first()
+        if row is not None:
+            if active_hist.has_changes() and not active_hist.deleted:
+                was_active = row[0]
+            if category_hist.has_changes() and not category_hist.deleted:
+                old_category = row[1]
+
+    # 解析好的旧启用状态转存实例，供after_flush的标签计数维护复用
+    target._flush_was_active = was_active
+
+    if was_active and old_category:
+        connection.execute(
+            text("UPDATE category SET website_count = website_count - 1 "
+                 "WHERE id = :cid AND website_count > 0"),
+            {'cid': old_category}
+        )
+    if target.is_active and target.category_id:
+        connection.execute(
+            text("UPDATE category SET website_count = website_count + 1 "
+                 "WHERE id = :cid"),
+            {'cid': target.category_id}
+        )
+
+
+@event.listens_for(Session, 'after_flush')
+def maintain_tag_website_counts(session, flush_context):
+    """flush后维护标签的冗余网站计数
+
+    此时新对象均已分配id、关联行已写入数据库，
+    按本次flush的实际变更汇总每个标签的增量后以UPDATE累加——
+    同一标签的多次变更正确叠加，且与分类计数一致只统计有效网站。
+    （网站删除在before_delete中处理，关联行彼时尚未级联删除。）
+    """
+    deltas = {}
+
+    def bump(tag_id, amount):
+        if tag_id is not None:
+            deltas[tag_id] = deltas.get(tag_id, 0) + amount
+
+    for obj in session.new:
+        if isinstance(obj, Website) and obj.is_active:
+            for tag in obj.tags:
+                bump(tag.id, 1)
+
+    connection = session.connection()
+    for obj in session.dirty:
+        if not isinstance(obj, Website):
+            continue
+        tags_hist = attributes.get_history(obj, 'tags')
+        # before_update监听器已解析旧的启用状态（含回查数据库的场景）；
+        # 仅关联变更时网站行没有UPDATE，启用状态即未变
+        was_active = obj.__dict__.pop('_flush_was_active', None)
+        if was_active is None:
+            active_hist = attributes.get_history(obj, 'is_active')
+            was_active = active_hist.deleted[0] if active_hist.deleted else obj.is_active
+        added = {tag.id for tag in tags_hist.added}
+        removed = {tag.id for tag in tags_hist.deleted}
+        if not added and not removed and bool(was_active) == bool(obj.is_active):
+            continue
+
+        # 旧/新贡献集合各算一遍，净增量自然抵消未变更的成员
+        current = {row[0] for row in connection.execute(
+            text("SELECT tag_id FROM website_tags WHERE website_id = :wid"),
+            {'wid': obj.id}
+        )}
+        previous = (current - added) | removed
+        if obj.is_active:
+            for tag_id in current:
+                bump(tag_id, 1)
+        if was_active:
+            for tag_id in previous:
+                bump(tag_id, -1)
+
+    for tag_id, delta in deltas.items():
+        if delta:
+            connection.execute(
+                text("UPDATE tag SET website_count = website_count + :delta "
+                     "WHERE id = :tid"),
+                {'delta': delta, 'tid': tag_id}
+            )
+
+
+def backfill_website_counts():
+    """回填分类与标签的冗余网站计数（新增计数列后执行一次）"""
+    db.session.execute(text(
+        "UPDATE category SET website_count = ("
+        " SELECT COUNT(*) FROM website"
+        " WHERE website.category_id = category.id AND website.is_active)"
+    ))
+    db.session.execute(text(
+        "UPDATE tag SET website_count = ("
+        " SELECT COUNT(*) FROM website_tags"
+        " JOIN website ON website.id = website_tags.website_id"
+        " WHERE website_tags.tag_id = tag.id AND website.is_active)"
+    ))
+    db.session.commit()
 
 
 # 初始化默认数据
@@ -561,8 +1148,9 @@ def init_default_data():
         admin.set_password('admin123')
         db.session.add(admin)
 
-    # 创建默认分类
+    # 创建默认分类（Core批量插入，绕开逐行的unit-of-work开销）
     if not Category.query.first():
+        db.session.flush()  # 管理员刚创建时确保拿到admin.id
         categories = [
             {'name': '常用工具', 'description': '日常使用的各种工具', 'icon': 'fas fa-tools', 'color': '#3498db'},
             {'name': '开发资源', 'description': '编程开发相关资源', 'icon': 'fas fa-code', 'color': '#2ecc71'},
@@ -570,18 +1158,26 @@ def init_default_data():
             {'name': '娱乐休闲', 'description': '娱乐和休闲网站', 'icon': 'fas fa-gamepad', 'color': '#f39c12'},
         ]
 
-        for i, cat_data in enumerate(categories):
-            category = Category(
-                name=cat_data['name'],
-                description=cat_data['description'],
-                icon=cat_data['icon'],
-                color=cat_data['color'],
-                sort_order=i,
-                user_id=admin.id
-            )
-            db.session.add(category)
-
-    # 创建默认设置
+        db.session.execute(Category.__table__.insert(), [
+            {
+                'name': cat_data['name'],
+                'description': cat_data['description'],
+                'icon': cat_data['icon'],
+                'color': cat_data['color'],
+                'sort_order': i,
+                'user_id': admin.id
+            }
+            for i, cat_data in enumerate(categories)
+        ])
+
+        # Core批量插入不经过mapper事件，物化路径需补写
+        # （均为顶级分类，路径即"<id>/"）
+        db.session.execute(text(
+            "UPDATE category SET path = CAST(id AS TEXT) || '/' "
+            "WHERE parent_id IS NULL AND path IS NULL"
+        ))
+
+    # 创建默认设置（一条IN查询预筛已有键，缺失项批量插入）
     default_settings = [
         ('site_name', 'OneBookNav', 'string', '网站名称', 'general'),
         ('site_description', '融合BookNav和OneNav优点的导航应用', 'string', '网站描述', 'general'),
@@ -591,17 +1187,26 @@ def init_default_data():
         ('backup_enabled', 'true', 'bool', '是否启用自动备份', 'system'),
     ]
 
-    for key, value, value_type, description, category in default_settings:
-        if not SiteSettings.query.filter_by(key=key).first():
-            setting = SiteSettings(
-                key=key,
-                value=value,
-                value_type=value_type,
-                description=description,
-                category=category,
-                is_public=True
-            )
-            db.session.add(setting)
+    existing_keys = set(db.session.execute(
+        db.select(SiteSettings.key).where(
+            SiteSettings.key.in_([item[0] for item in default_settings])
+        )
+    ).scalars())
+
+    missing = [
+        {
+            'key': key,
+            'value': value,
+            'value_type': value_type,
+            'description': description,
+            'category': category,
+            'is_public': True
+        }
+        for key, value, value_type, description, category in default_settings
+        if key not in existing_keys
+    ]
+    if missing:
+        db.session.execute(SiteSettings.__table__.insert(), missing)
 
     db.session.commit()
     print("Default data initialized successfully!")
\ No newline at end of file
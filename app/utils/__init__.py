@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 工具包
+"""
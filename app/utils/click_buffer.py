@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 点击计数缓冲
+将热点路径上的点击写入合并为周期性的批量UPDATE，
+避免每次点击都产生一次同步写事务
+"""
+import time
+from collections import Counter
+from datetime import datetime
+from threading import Lock
+
+from app import db
+
+# 批量回写间隔（秒）与触发阈值（条）
+FLUSH_INTERVAL = 5
+FLUSH_THRESHOLD = 100
+
+_counter = Counter()
+_lock = Lock()
+_last_flush = time.monotonic()
+
+
+def record(website_id: int) -> int:
+    """缓冲一次点击，返回该网站当前的待回写增量"""
+    with _lock:
+        _counter[website_id] += 1
+        pending = _counter[website_id]
+        should_flush = (
+            sum(_counter.values()) >= FLUSH_THRESHOLD or
+            time.monotonic() - _last_flush >= FLUSH_INTERVAL
+        )
+    if should_flush:
+        flush()
+    return pending
+
+
+def flush_if_due():
+    """缓冲非空且超过回写间隔时执行一次回写
+
+    挂在after_request上兜底：低流量时段没有新点击触发record，
+    尾部的缓冲增量也能随后续任意请求落库。
+    """
+    with _lock:
+        due = bool(_counter) and time.monotonic() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def pending_clicks(website_id: int) -> int:
+    """查询某网站当前未回写的点击增量"""
+    with _lock:
+        return _counter.get(website_id, 0)
+
+
+def flush():
+    """将缓冲的点击增量批量回写数据库"""
+    global _last_flush
+    with _lock:
+        if not _counter:
+            _last_flush = time.monotonic()
+            return
+        pending = dict(_counter)
+        _counter.clear()
+        _last_flush = time.monotonic()
+
+    from app.models import Website
+    table = Website.__table__
+    stmt = table.update().where(table.c.id == db.bindparam('wid')).values(
+        click_count=table.c.click_count + db.bindparam('delta'),
+        last_clicked_at=datetime.utcnow(),
+    )
+    db.session.execute(stmt, [{'wid': wid, 'delta': delta} for wid, delta in pending.items()])
+    db.session.commit()
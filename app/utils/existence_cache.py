@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 用户名/邮箱存在性缓存
+缓存全量小写用户名与邮箱集合，/check-*端点做集合成员判断即可，
+不再逐次查询数据库
+"""
+from sqlalchemy import func, select
+
+from app import cache, db
+
+_USERNAMES_KEY = 'existing:usernames'
+_EMAILS_KEY = 'existing:emails'
+_TTL = 300
+
+
+def _load(key: str, column) -> frozenset:
+    """取缓存的存在集合，未命中时从数据库重建"""
+    values = cache.get(key)
+    if values is None:
+        rows = db.session.execute(select(func.lower(column))).scalars().all()
+        values = frozenset(rows)
+        cache.set(key, values, timeout=_TTL)
+    return values
+
+
+def username_exists(username: str) -> bool:
+    """用户名是否已被占用（大小写不敏感）"""
+    from app.models import User
+    return username.lower() in _load(_USERNAMES_KEY, User.username)
+
+
+def email_exists(email: str) -> bool:
+    """邮箱是否已被占用（大小写不敏感）"""
+    from app.models import User
+    return email.lower() in _load(_EMAILS_KEY, User.email)
+
+
+def add_user(username: str, email: str):
+    """注册成功后把新用户加入缓存集合，避免TTL窗口内误报可用"""
+    for key, value in ((_USERNAMES_KEY, username), (_EMAILS_KEY, email)):
+        values = cache.get(key)
+        if values is not None:
+            cache.set(key, frozenset(values | {value.lower()}), timeout=_TTL)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav JSON响应缓存
+缓存API端点序列化后的完整JSON响应体，
+命中时直接返回字节串，完全绕过ORM与序列化
+"""
+from functools import wraps
+
+from flask import current_app, request
+from flask_login import current_user
+
+from app import cache
+
+
+def json_cache(timeout: int = 60):
+    """缓存视图的JSON响应体（按 路径+查询串+用户 区分）"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (
+                f'json:{request.path}|'
+                f'{request.query_string.decode("utf-8", "ignore")}|'
+                f'{current_user.get_id() or 0}'
+            )
+            cached_body = cache.get(key)
+            if cached_body is not None:
+                return current_app.response_class(cached_body, mimetype='application/json')
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(key, response.get_data(), timeout=timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav JSON序列化提供器
+使用orjson（Rust实现的SIMD编码器）替代标准库json，
+加速API响应中嵌套字典的序列化；未安装时保持Flask默认实现
+"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import JSONProvider
+except ImportError:  # Flask < 2.2 无provider机制
+    JSONProvider = None
+
+
+if orjson is not None and JSONProvider is not None:
+
+    class OrjsonProvider(JSONProvider):
+        """基于orjson的Flask JSON提供器"""
+
+        def dumps(self, obj, **kwargs) -> str:
+            return orjson.dumps(
+                obj,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            ).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+else:
+    OrjsonProvider = None
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 用户活动时间记录
+对last_seen写入做节流与批量回写，
+避免每个已登录请求都产生一次写事务
+"""
+from datetime import datetime
+from threading import Lock
+
+from app import cache, db
+
+# 同一用户两次记录之间的最小间隔（秒）
+THROTTLE_SECONDS = 60
+
+# 待回写缓冲：user_id -> 最后活动时间
+_buffer = {}
+_lock = Lock()
+
+
+def touch(user_id: int):
+    """记录用户最后活动时间（节流后写入内存缓冲，不直接写库）"""
+    # cache.add为原子检查并设置，节流窗口内直接跳过
+    if not cache.add(f'last_seen:{user_id}', 1, timeout=THROTTLE_SECONDS):
+        return
+    with _lock:
+        _buffer[user_id] = datetime.utcnow()
+
+
+def flush():
+    """批量回写缓冲的活动时间（在after_request中调用）"""
+    with _lock:
+        if not _buffer:
+            return
+        pending = dict(_buffer)
+        _buffer.clear()
+
+    from app.models import User
+    stmt = User.__table__.update().where(
+        User.__table__.c.id == db.bindparam('uid')
+    ).values(last_seen=db.bindparam('ts'))
+    db.session.execute(stmt, [{'uid': uid, 'ts': ts} for uid, ts in pending.items()])
+    db.session.commit()
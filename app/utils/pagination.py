@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 分页工具
+提供基于(created_at, id)键集游标的分页辅助，
+避免深分页时OFFSET逐行跳过的开销
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """将(created_at, id)编码为不透明游标"""
+    raw = f'{created_at.isoformat()}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """解码游标，非法输入返回None"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        ts, _, row_id = raw.partition('|')
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class WindowPagination:
+    """轻量分页对象
+
+    暴露与Flask-SQLAlchemy Pagination兼容的只读属性子集，
+    供模板中现有的分页组件直接使用。
+    """
+
+    def __init__(self, items, page: int, per_page: int, total: int):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        if not self.total:
+            return 0
+        return (self.total + self.per_page - 1) // self.per_page
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=5, right_edge=2):
+        last = 0
+        for num in range(1, self.pages + 1):
+            if (num <= left_edge or
+                    (self.page - left_current - 1 < num < self.page + right_current) or
+                    num > self.pages - right_edge):
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+
+def window_paginate(query, page: int, per_page: int) -> WindowPagination:
+    """页数据与总数合并为一条语句（COUNT(*) OVER()窗口函数）
+
+    省去paginate()为计算总页数而额外发出的COUNT查询。
+    """
+    from sqlalchemy import func
+
+    rows = query.add_columns(
+        func.count().over().label('total')
+    ).limit(per_page).offset((page - 1) * per_page).all()
+    if rows:
+        total = rows[0][-1]
+        items = [row[0] for row in rows]
+    else:
+        # 页码越过末尾时窗口查询取不到行，总数需单独COUNT，
+        # 分页组件才能继续渲染并导航回有效页
+        items = []
+        total = query.order_by(None).count()
+    return WindowPagination(items, page, per_page, total)
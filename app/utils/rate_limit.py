@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 速率限制工具
+基于Flask-Caching的固定窗口计数器，限制高频AJAX端点；
+缓存后端为Redis时天然多进程共享，SimpleCache下为进程内限制
+"""
+import time
+from functools import wraps
+
+from flask import jsonify, request
+
+from app import cache
+
+
+def _window_key(per: int) -> str:
+    """当前窗口的计数键：端点 + 客户端地址 + 窗口序号"""
+    window = int(time.time() // per)
+    return f'rl:{request.endpoint}:{request.remote_addr}:{window}'
+
+
+def rate_limit(limit: int = 10, per: int = 60):
+    """固定窗口速率限制装饰器
+
+    Args:
+        limit: 窗口内允许的最大请求数
+        per: 窗口长度（秒）
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _window_key(per)
+            count = cache.get(key) or 0
+            if count >= limit:
+                response = jsonify({'error': '请求过于频繁，请稍后再试'})
+                response.status_code = 429
+                return response
+            # 窗口计数非严格原子，竞态下略微放宽限额，可接受
+            cache.set(key, count + 1, timeout=per)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
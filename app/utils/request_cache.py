@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 请求级缓存
+在flask.g上按请求生命周期缓存计算结果，
+避免上下文处理器在同一请求内重复执行
+"""
+from flask import g
+
+# 哨兵值，区分"未缓存"与"缓存结果为None"
+_MISSING = object()
+
+
+def g_cached(key, fn):
+    """在g对象上缓存fn()的结果，同一请求内只计算一次"""
+    value = getattr(g, key, _MISSING)
+    if value is _MISSING:
+        value = fn()
+        setattr(g, key, value)
+    return value
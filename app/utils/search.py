@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 搜索工具
+基于SQLite FTS5全文索引的网站搜索，
+索引不可用时回退到LIKE模糊匹配；
+PostgreSQL部署下可建pg_trgm三元组索引加速LIKE路径
+"""
+from sqlalchemy import or_, text
+
+from app import db
+from app.models import Website
+
+FTS_TABLE = 'website_fts'
+
+# FTS索引可用性（进程内缓存，update_search_index后重置）
+_fts_available = None
+
+
+def _is_sqlite() -> bool:
+    return db.engine.url.get_backend_name() == 'sqlite'
+
+
+def _is_postgresql() -> bool:
+    return db.engine.url.get_backend_name() == 'postgresql'
+
+
+def fts_enabled() -> bool:
+    """FTS5索引是否可用"""
+    global _fts_available
+    if _fts_available is None:
+        if not _is_sqlite():
+            _fts_available = False
+        else:
+            row = db.session.execute(
+                text("SELECT name FROM sqlite_master WHERE type='table' AND name=:name"),
+                {'name': FTS_TABLE}
+            ).first()
+            _fts_available = row is not None
+    return _fts_available
+
+
+def _sanitize_match(query: str) -> str:
+    """将用户输入转义为安全的FTS5 MATCH表达式（逐词加引号）"""
+    terms = [term.replace('"', '') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms if term)
+
+
+def search_websites(query: str):
+    """返回匹配搜索词的Website查询对象
+
+    优先走FTS5倒排索引（按bm25相关度取候选集），
+    无索引时回退到四列LIKE扫描。
+    """
+    if fts_enabled():
+        # 纯引号等输入转义后为空，空MATCH表达式是FTS5语法错误，
+        # 此时回退LIKE路径
+        match = _sanitize_match(query)
+        if match:
+            rows = db.session.execute(
+                text(
+                    f"SELECT rowid FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH :q ORDER BY bm25({FTS_TABLE}) LIMIT :limit"
+                ),
+                {'q': match, 'limit': 500}
+            ).all()
+            ids = [row[0] for row in rows]
+            return Website.query.filter(Website.id.in_(ids))
+
+    return Website.query.filter(
+        or_(
+            Website.title.contains(query),
+            Website.description.contains(query),
+            Website.keywords.contains(query),
+            Website.url.contains(query)
+        )
+    )
+
+
+def update_search_index():
+    """创建/重建搜索索引（CLI命令调用）
+
+    SQLite下创建FTS5索引及同步触发器；
+    PostgreSQL下创建pg_trgm三元组索引，使LIKE '%q%'回退路径
+    走GIN索引并具备一定的容错匹配能力。
+    """
+    global _fts_available
+
+    if _is_postgresql():
+        _create_trigram_indexes()
+        return
+
+    if not _is_sqlite():
+        return
+
+    statements = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            title, description, keywords, url,
+            content='website', content_rowid='id'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS website_fts_ai AFTER INSERT ON website BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description, keywords, url)
+            VALUES (new.id, new.title, new.description, new.keywords, new.url);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS website_fts_ad AFTER DELETE ON website BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, keywords, url)
+            VALUES ('delete', old.id, old.title, old.description, old.keywords, old.url);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS website_fts_au AFTER UPDATE ON website BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, keywords, url)
+            VALUES ('delete', old.id, old.title, old.description, old.keywords, old.url);
+            INSERT INTO {FTS_TABLE}(rowid, title, description, keywords, url)
+            VALUES (new.id, new.title, new.description, new.keywords, new.url);
+        END""",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+    _fts_available = None
+
+
+def _create_trigram_indexes():
+    """创建pg_trgm扩展及各搜索列的GIN三元组索引（仅PostgreSQL）"""
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_website_title_trgm "
+        "ON website USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_website_description_trgm "
+        "ON website USING gin (description gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_website_keywords_trgm "
+        "ON website USING gin (keywords gin_trgm_ops)",
+    ]
+    for statement in statements:
+        db.session.execute(text(statement))
+    db.session.commit()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 设置缓存
+使用Flask-Caching缓存站点设置，避免每次请求都查询数据库
+"""
+from app import cache
+
+
+@cache.memoize(timeout=300)
+def cached_site_settings() -> dict:
+    """获取缓存的全部站点设置（普通字典，可序列化到Redis等后端）"""
+    from app.models import SiteSettings
+    return SiteSettings.get_settings()
+
+
+@cache.memoize(timeout=300)
+def cached_public_settings() -> dict:
+    """获取缓存的公开站点设置"""
+    from app.models import SiteSettings
+    settings = SiteSettings.query.filter_by(is_public=True).all()
+    return {setting.key: setting.get_value() for setting in settings}
+
+
+def invalidate_settings_cache():
+    """设置更新后清除缓存"""
+    cache.delete_memoized(cached_site_settings)
+    cache.delete_memoized(cached_public_settings)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 标签可见性聚合缓存
+预计算每个标签的公开网站数量，供匿名访问的标签列表
+在不触发任何关系加载的情况下完成过滤
+"""
+from sqlalchemy import func, select
+
+from app import cache, db
+
+CACHE_KEY = 'tag_public_counts'
+CACHE_TIMEOUT = 300
+
+
+def get_tag_public_counts() -> dict:
+    """获取 {tag_id: 公开网站数} 聚合结果（缓存5分钟）"""
+    counts = cache.get(CACHE_KEY)
+    if counts is None:
+        from app.models import Website, website_tags
+
+        rows = db.session.execute(
+            select(
+                website_tags.c.tag_id,
+                func.count(Website.id)
+            ).select_from(
+                website_tags.join(Website, Website.id == website_tags.c.website_id)
+            ).where(
+                Website.is_active == True,
+                Website.is_public == True
+            ).group_by(website_tags.c.tag_id)
+        ).all()
+        counts = {tag_id: count for tag_id, count in rows}
+        cache.set(CACHE_KEY, counts, timeout=CACHE_TIMEOUT)
+    return counts
+
+
+def invalidate_tag_public_counts():
+    """网站增删改后清除聚合缓存"""
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav 主题工具
+提供当前主题读取、可用主题列表等辅助函数
+"""
+from flask import current_app, g, render_template, session
+
+
+# 内置默认主题
+DEFAULT_THEMES = {
+    'default': {'name': '默认主题', 'description': '简洁明亮的默认主题'},
+}
+
+
+def get_current_theme() -> str:
+    """获取当前主题"""
+    return session.get('theme', current_app.config.get('DEFAULT_THEME', 'default'))
+
+
+def get_available_themes() -> dict:
+    """获取可用主题列表"""
+    return current_app.config.get('THEMES', DEFAULT_THEMES)
+
+
+def init_default_themes():
+    """初始化默认主题配置"""
+    themes = current_app.config.setdefault('THEMES', {})
+    for key, meta in DEFAULT_THEMES.items():
+        themes.setdefault(key, meta)
+
+
+def themed(template: str, **context):
+    """按当前主题渲染模板（themes/<g.theme>/<template>）"""
+    return render_template(f'themes/{g.theme}/{template}', **context)
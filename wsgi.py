@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+OneBookNav WSGI入口
+API路由均为I/O密集型数据库操作，默认同步worker会在每次
+db.session.commit()期间阻塞整个worker；通过gevent协程化
+（gunicorn -k gevent）或ASGI包装提升并发能力
+"""
+import os
+
+# gevent monkey-patch必须在导入Flask之前执行
+if os.environ.get('GEVENT', '').lower() in ('1', 'true', 'yes', 'on'):
+    from gevent import monkey
+    monkey.patch_all()
+
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'default'))
+
+# ASGI=1 时包装为ASGI应用，可直接用uvicorn等运行
+if os.environ.get('ASGI', '').lower() in ('1', 'true', 'yes', 'on'):
+    from asgiref.wsgi import WsgiToAsgi
+    asgi_app = WsgiToAsgi(app)